@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+BeyTV HTTP serving - single-threaded or bounded worker-pool servers
+Shared by main.py, main_qbt.py and main_hybrid.py
+"""
+
+import os
+import gzip
+import json
+import zlib
+import hashlib
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer
+
+# Optional: brotli is only used when installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# SERVER_MODE=single keeps the old one-request-at-a-time behaviour
+SERVER_MODE = os.environ.get('SERVER_MODE', 'threaded')
+SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS', 32))
+# Seconds an idle keep-alive connection may hold a worker before it is closed
+SERVER_KEEPALIVE = int(os.environ.get('SERVER_KEEPALIVE', 5))
+# Connections kept open between requests, each waiting on a worker of its own;
+# past this, responses close the connection so idle sockets can't starve the pool
+SERVER_KEEPALIVE_CONNECTIONS = int(os.environ.get('SERVER_KEEPALIVE_CONNECTIONS', SERVER_WORKERS // 4))
+
+# Responses smaller than this are sent as-is, gzip would not pay for itself
+GZIP_MIN_BYTES = 1024
+MAX_REQUEST_BYTES = 10 * 1024 * 1024
+
+STATIC_DIR = Path(__file__).resolve().parent / 'static'
+# Browsers revalidate the dashboard on every load; an unchanged page costs a 304
+STATIC_CACHE_CONTROL = 'no-cache'
+
+class RequestBodyError(Exception):
+    """A request body that can't be used; `status` is the HTTP status to answer with"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer that handles each connection on a bounded thread pool,
+    so one slow request no longer blocks every other client"""
+
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class, workers=SERVER_WORKERS,
+                 keepalive_connections=SERVER_KEEPALIVE_CONNECTIONS):
+        super().__init__(server_address, handler_class)
+        self.workers = workers
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='http')
+        # At least one worker is always left for connections that are not kept open
+        self.keepalive_slots = threading.BoundedSemaphore(max(0, min(keepalive_connections, workers - 1)))
+
+    def acquire_keepalive(self):
+        """Reserve a keep-alive slot for a connection; False when they are all taken"""
+        return self.keepalive_slots.acquire(blocking=False)
+
+    def release_keepalive(self):
+        self.keepalive_slots.release()
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False)
+
+def make_server(server_address, handler_class):
+    """Build the HTTP server selected by SERVER_MODE"""
+    if SERVER_MODE == 'single':
+        # A kept-alive connection would lock everyone else out, so stay on HTTP/1.0
+        handler_class = type(handler_class.__name__, (handler_class,), {'protocol_version': 'HTTP/1.0'})
+        return HTTPServer(server_address, handler_class)
+    return PooledHTTPServer(server_address, handler_class, SERVER_WORKERS)
+
+def describe_mode(httpd):
+    if isinstance(httpd, PooledHTTPServer):
+        return f"{httpd.workers} worker threads"
+    return "single-threaded"
+
+def accepted_encodings(header):
+    """Content codings a client accepts, from its Accept-Encoding header"""
+    accepted = set()
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        q = params.strip()
+        if q.startswith('q='):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+class KeepAliveHandler:
+    """Mixin for BaseHTTPRequestHandler subclasses speaking HTTP/1.1: every
+    response carries a Content-Length, JSON is gzipped for clients that accept
+    it, and gzip request bodies are inflated"""
+
+    protocol_version = 'HTTP/1.1'
+    timeout = SERVER_KEEPALIVE
+    compress_responses = True
+    keepalive_slot = False
+
+    def handle_one_request(self):
+        # Cleared first, so log_error can tell an idle connection from a stalled request
+        self.raw_requestline = b''
+        super().handle_one_request()
+
+    def log_error(self, format, *args):
+        if not self.raw_requestline and format.startswith('Request timed out'):
+            # An idle keep-alive connection running out is how it normally ends
+            return
+        super().log_error(format, *args)
+
+    def end_headers(self):
+        # Stay open only while a keep-alive slot is free on the pool
+        if not self.close_connection and not self.keepalive_slot:
+            acquire = getattr(self.server, 'acquire_keepalive', None)
+            self.keepalive_slot = bool(acquire and acquire())
+            if not self.keepalive_slot:
+                self.send_header('Connection', 'close')
+        super().end_headers()
+
+    def finish(self):
+        try:
+            super().finish()
+        finally:
+            if self.keepalive_slot:
+                self.keepalive_slot = False
+                self.server.release_keepalive()
+
+    def read_body(self):
+        """The request body, decompressed if the client sent it gzipped.
+        Raises RequestBodyError (400 or 413) for a body that can't be used"""
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            self.close_connection = True
+            raise RequestBodyError(400, "Invalid Content-Length")
+        if length > MAX_REQUEST_BYTES:
+            # The body is left unread, so the connection can't carry another request
+            self.close_connection = True
+            raise RequestBodyError(413, "Request body too large")
+        body = self.rfile.read(length) if length > 0 else b''
+
+        if self.headers.get('Content-Encoding', '').lower() == 'gzip':
+            inflater = zlib.decompressobj(wbits=31)
+            try:
+                body = inflater.decompress(body, MAX_REQUEST_BYTES + 1)
+            except zlib.error:
+                raise RequestBodyError(400, "Malformed gzip body")
+            if len(body) > MAX_REQUEST_BYTES:
+                raise RequestBodyError(413, "Request body too large")
+            if not inflater.eof:
+                raise RequestBodyError(400, "Truncated gzip body")
+        return body
+
+    def read_json(self, empty=None, types=(dict,)):
+        """The request body parsed as JSON, or `empty` when there is no body.
+        Raises RequestBodyError (400) unless it parses to one of `types`"""
+        body = self.read_body()
+        if not body and empty is not None:
+            return empty
+        try:
+            data = json.loads(body.decode('utf-8'))
+        except ValueError:
+            raise RequestBodyError(400, "Request body is not valid JSON")
+        if not isinstance(data, types):
+            names = ' or '.join({dict: 'object', list: 'array'}.get(t, t.__name__) for t in types)
+            raise RequestBodyError(400, f"Request body must be a JSON {names}")
+        return data
+
+    def send_json(self, data, status=200, headers=()):
+        """Send `data` (or already-encoded JSON bytes) as the whole response"""
+        body = data if isinstance(data, bytes) else json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_encoded(body)
+
+    def send_encoded(self, body, gzipped=None):
+        """Finish the headers and write `body`, gzipped when worthwhile and accepted.
+        `gzipped` may carry a copy that was already compressed"""
+        if self.compress_responses and len(body) >= GZIP_MIN_BYTES:
+            self.send_header('Vary', 'Accept-Encoding')
+            if accepted_encodings(self.headers.get('Accept-Encoding')) & {'gzip', '*'}:
+                body = gzipped or gzip.compress(body, compresslevel=6)
+                self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class StaticAsset:
+    """A file from static/ read and compressed once at startup, then served
+    from memory with a strong ETag so reloads get a 304"""
+
+    def __init__(self, name, content_type='text/html; charset=utf-8'):
+        body = (STATIC_DIR / name).read_bytes()
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.content_type = content_type
+        # Each coding is a different representation, so each gets its own strong ETag
+        self.variants = {'identity': (f'"{digest}"', body)}
+        if brotli:
+            self.variants['br'] = (f'"{digest}-br"', brotli.compress(body))
+        self.variants['gzip'] = (f'"{digest}-gz"', gzip.compress(body, mtime=0))
+
+    def select(self, accept_encoding):
+        accepted = accepted_encodings(accept_encoding)
+        for coding in ('br', 'gzip'):
+            if coding in self.variants and (coding in accepted or '*' in accepted):
+                return coding
+        return 'identity'
+
+    def serve(self, handler):
+        coding = self.select(handler.headers.get('Accept-Encoding'))
+        etag, body = self.variants[coding]
+
+        if_none_match = handler.headers.get('If-None-Match', '')
+        tags = {tag.strip() for tag in if_none_match.split(',')}
+        tags |= {tag[2:] for tag in tags if tag.startswith('W/')}
+        # Only the representation about to be sent counts; a cached gzip copy
+        # says nothing about what a client now asking for identity holds
+        if '*' in tags or etag in tags:
+            handler.send_response(304)
+            handler.send_header('ETag', etag)
+            handler.send_header('Cache-Control', STATIC_CACHE_CONTROL)
+            handler.send_header('Vary', 'Accept-Encoding')
+            handler.end_headers()
+            return
+
+        handler.send_response(200)
+        handler.send_header('Content-Type', self.content_type)
+        handler.send_header('Content-Length', str(len(body)))
+        if coding != 'identity':
+            handler.send_header('Content-Encoding', coding)
+        handler.send_header('ETag', etag)
+        handler.send_header('Cache-Control', STATIC_CACHE_CONTROL)
+        handler.send_header('Vary', 'Accept-Encoding')
+        handler.end_headers()
+        handler.wfile.write(body)
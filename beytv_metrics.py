@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+BeyTV metrics - counters, gauges and latency histograms rendered in the
+Prometheus text format, without the prometheus_client dependency
+"""
+
+import bisect
+import threading
+
+# Seconds; covers cached API hits up to long-polls and slow upstreams
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        for suffix, label_values, extra, value in self.samples():
+            lines.append(f'{self.name}{suffix}{format_labels(self.labels, label_values, extra)} {format_value(value)}')
+        return '\n'.join(lines)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self.values.items())
+        for label_values, value in items:
+            yield '', label_values, (), value
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+class Gauge(Metric):
+    """Gauge set directly, or read from `collect()` -> {label values: value} at scrape time"""
+    kind = 'gauge'
+
+    def __init__(self, name, help, labels=(), collect=None):
+        super().__init__(name, help, labels)
+        self.collect = collect
+
+    def set(self, value, *label_values):
+        with self._lock:
+            self.values[label_values] = value
+
+    def samples(self):
+        if self.collect:
+            values = self.collect()
+            with self._lock:
+                self.values = dict(values)
+        return super().samples()
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            state = self.values.get(label_values)
+            if state is None:
+                # Per-bucket counts (the last one is +Inf), sum
+                state = self.values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+
+    def samples(self):
+        with self._lock:
+            items = sorted((labels, (list(counts), total)) for labels, (counts, total) in self.values.items())
+        for label_values, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                yield '_bucket', label_values, [('le', bound)], cumulative
+            yield '_sum', label_values, (), total
+            yield '_count', label_values, (), cumulative
+
+class MetricsRegistry:
+    """The set of metrics served by /metrics"""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=(), collect=None):
+        return self.register(Gauge(name, help, labels, collect))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format"""
+        return '\n'.join(metric.render() for metric in self.metrics) + '\n'
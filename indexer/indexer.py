@@ -11,6 +11,7 @@ QB_PASS = os.getenv("QB_PASS", "adminadmin")
 FEEDS = [f.strip() for f in os.getenv("FEEDS","https://yts.mx/rss").split(",") if f.strip()]
 CATEGORY = os.getenv("CATEGORY", "auto")
 LIMIT = int(os.getenv("LIMIT", "30"))
+CACHE_FILE = os.getenv("CACHE_FILE", "feeds/cache.json")
 
 def qb_login(session):
     url = f"{QB_URL}/api/v2/auth/login"
@@ -25,22 +26,54 @@ def qb_add(session, magnet):
     data = {"urls": magnet, "category": CATEGORY}
     session.post(url, data=data, timeout=15)
 
+def load_feed_cache():
+    try:
+        return json.loads(Path(CACHE_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def save_feed_cache(cache):
+    Path(CACHE_FILE).parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(f"{CACHE_FILE}.tmp")
+    tmp.write_text(json.dumps(cache), encoding="utf-8")
+    tmp.replace(CACHE_FILE)
+
+def parse_items(d, source):
+    items = []
+    for e in d.entries[:LIMIT]:
+        title = e.get("title", "unknown")
+        link = e.get("link", "")
+        if "magnet:?" in link:
+            magnet = link
+        else:
+            # fallback for rss with magnet link in enclosure
+            magnet = e.get("enclosures", [{}])[0].get("url", "")
+        if not magnet.startswith("magnet:"):
+            continue
+        items.append({"title": title, "magnet": magnet, "source": source})
+    return items
+
 def fetch_feeds():
+    cache = load_feed_cache()
     all_items = []
     for f in FEEDS:
         print(f"Fetching {f}")
-        d = feedparser.parse(f)
-        for e in d.entries[:LIMIT]:
-            title = e.get("title", "unknown")
-            link = e.get("link", "")
-            if "magnet:?" in link:
-                magnet = link
-            else:
-                # fallback for rss with magnet link in enclosure
-                magnet = e.get("enclosures", [{}])[0].get("url", "")
-            if not magnet.startswith("magnet:"):
-                continue
-            all_items.append({"title": title, "magnet": magnet, "source": f})
+        cached = cache.get(f, {})
+        # conditional GET: a 304 reuses the last parse
+        d = feedparser.parse(f, etag=cached.get("etag"), modified=cached.get("modified"))
+        status = d.get("status")
+        if status == 304 and "items" in cached:
+            print(f"  not modified, {len(cached['items'])} cached items")
+            items = cached["items"]
+        elif status is not None and 200 <= status < 300:
+            items = parse_items(d, f)
+            cache[f] = {"etag": d.get("etag"), "modified": d.get("modified"), "items": items}
+        else:
+            # failed fetch: keep the validators and the last good parse
+            items = cached.get("items", [])
+            print(f"  fetch failed ({status or d.get('bozo_exception')}), {len(items)} cached items")
+        all_items.extend(items)
+    save_feed_cache(cache)
     return all_items
 
 def main():
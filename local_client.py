@@ -7,11 +7,38 @@ Connects to your Replit BeyTV dashboard and downloads files locally for Plex
 import os
 import time
 import json
+import gzip
+import uuid
+import socket
+import threading
 import subprocess
 import webbrowser
 from pathlib import Path
 from urllib.parse import urlparse
 import shutil
+from release_parser import parse_release, parse_infohash
+
+# Seconds the server may hold a checkin open waiting for work; 0 polls every 15s
+LONG_POLL_SECONDS = float(os.environ.get('BEYTV_LONG_POLL', 25))
+
+# Most downloads this client holds at once; the server hands out no more
+MAX_ACTIVE_DOWNLOADS = int(os.environ.get('BEYTV_MAX_ACTIVE', 5))
+
+# Status updates are buffered and sent together at most this often
+STATUS_BATCH_SECONDS = 5
+
+# Seconds between heartbeats that keep leases alive during long downloads;
+# the server counts a client online for 60 seconds after it was last heard from
+HEARTBEAT_SECONDS = 30
+
+# Magnets handed to the local qBittorrent, kept across restarts until they finish
+ACTIVE_TORRENTS_FILE = Path.home() / ".beytv_torrents.json"
+# A magnet that makes no progress for this long (dead swarm, no metadata) is failed
+TORRENT_STALL_SECONDS = int(os.environ.get('BEYTV_TORRENT_STALL', 6 * 3600))
+QBT_URL = "http://localhost:8080"
+
+# Request bodies at least this big are gzipped before upload
+GZIP_MIN_BYTES = 1024
 
 # Optional imports
 try:
@@ -23,6 +50,18 @@ except ImportError:
 
 class BeyTVLocalClient:
     def __init__(self):
+        # Last change sequence seen; the server only sends newer queued rows
+        self.cursor = 0
+        self.has_more = False
+        self.long_poll = False
+        self.pending_updates = []
+        self.last_flush = time.time()
+        self.lease_seconds = None
+        # Direct downloads in progress; heartbeats renew only these and active_torrents
+        self.working = set()
+        self.active_torrents = self.load_active_torrents()
+        # One keep-alive connection for checkins and status batches
+        self.session = requests.Session() if HAS_REQUESTS else None
         self.setup_config()
         
     def setup_config(self):
@@ -35,21 +74,27 @@ class BeyTVLocalClient:
         if config_file.exists():
             with open(config_file) as f:
                 config = json.load(f)
-                self.replit_url = config.get('replit_url', '')
         else:
-            self.replit_url = ''
-            
-        if not self.replit_url:
-            self.replit_url = input("📱 Enter your Replit BeyTV URL: ").strip()
+            config = {}
+        self.replit_url = config.get('replit_url', '')
+        
+        # Each machine leases its own share of the queue under a stable id
+        self.client_id = config.get('client_id', '')
+        
+        if not self.replit_url or not self.client_id:
+            if not self.replit_url:
+                self.replit_url = input("📱 Enter your Replit BeyTV URL: ").strip()
+            if not self.client_id:
+                self.client_id = f"{socket.gethostname()}-{uuid.uuid4().hex[:6]}"
             # Save for next time
             with open(config_file, 'w') as f:
-                json.dump({'replit_url': self.replit_url}, f)
+                json.dump({'replit_url': self.replit_url, 'client_id': self.client_id}, f)
         
         # Setup download paths for Plex
         self.setup_plex_paths()
         
-        self.client_id = "plex_client_1"
         print(f"🌐 Connected to: {self.replit_url}")
+        print(f"🆔 Client id: {self.client_id}")
         print(f"📁 Movies folder: {self.movies_path}")
         print(f"📺 TV Shows folder: {self.tv_path}")
         
@@ -80,40 +125,38 @@ class BeyTVLocalClient:
             return False
             
         try:
-            available_space = shutil.disk_usage(self.downloads_path)[2]  # Free space
-            data = {
-                'client_id': self.client_id,
-                'downloads_path': str(self.downloads_path),
-                'available_space': available_space,
-                'status': 'online'
-            }
-            
-            response = requests.post(
-                f"{self.replit_url}/api/client/checkin",
-                json=data,
-                timeout=10
+            data = dict(
+                self.client_info(),
+                cursor=self.cursor,
+                limit=20,
+                wait=LONG_POLL_SECONDS
             )
             
+            # The server answers as soon as work is queued, or after `wait` seconds
+            response = self.post_json('/api/client/checkin', data, timeout=10 + LONG_POLL_SECONDS)
+            
             if response.status_code == 200:
                 result = response.json()
+                self.cursor = result.get('cursor', self.cursor)
+                self.has_more = result.get('has_more', False)
+                self.long_poll = result.get('long_poll', False)
+                self.lease_seconds = result.get('lease_seconds', self.lease_seconds)
                 return result.get('queued_downloads', [])
+            # Back off for the usual 15 seconds instead of retrying straight away
+            self.has_more = False
+            self.long_poll = False
             return []
             
         except Exception as e:
             print(f"❌ Failed to check in with server: {e}")
+            self.has_more = False
+            self.long_poll = False
             return []
 
     def categorize_content(self, title):
         """Determine if content is movie or TV show"""
-        title_lower = title.lower()
-        
-        # TV show indicators
-        tv_indicators = ['s01e', 's02e', 's03e', 'season', 'episode', 'ep', 'x264-', 'hdtv']
-        if any(indicator in title_lower for indicator in tv_indicators):
-            return 'tv'
-        
-        # Default to movie
-        return 'movie'
+        # Season/episode markers mean TV, anything else is a movie
+        return parse_release(title).content_type
 
     def get_download_path(self, title):
         """Get appropriate download path based on content type"""
@@ -138,12 +181,16 @@ class BeyTVLocalClient:
         # Sanitize filename
         safe_filename = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_', '.')).rstrip()
         
-        if url.startswith('magnet:'):
-            # Handle magnet links
-            return self.download_magnet(url, safe_filename, download_id, download_path)
-        else:
-            # Handle direct downloads
-            return self.download_direct(url, safe_filename, download_id, download_path)
+        self.working.add(download_id)
+        try:
+            if url.startswith('magnet:'):
+                # Handle magnet links
+                return self.download_magnet(url, safe_filename, download_id, download_path)
+            else:
+                # Handle direct downloads
+                return self.download_direct(url, safe_filename, download_id, download_path)
+        finally:
+            self.working.discard(download_id)
 
     def download_magnet(self, magnet_url, filename, download_id, download_path):
         """Download magnet link using qBittorrent or save magnet file"""
@@ -153,6 +200,16 @@ class BeyTVLocalClient:
             # Try qBittorrent API first
             if self.add_to_qbittorrent(magnet_url, download_path):
                 print(f"✅ Added to qBittorrent: {filename}")
+                infohash = parse_infohash(magnet_url)
+                if infohash:
+                    # Stay 'downloading', keeping the lease and its disk reservation on the
+                    # server, until qBittorrent has the whole torrent
+                    self.active_torrents[str(download_id)] = {
+                        'hash': infohash, 'path': str(download_path), 'progress': 0, 'progress_at': time.time()
+                    }
+                    self.save_active_torrents()
+                else:
+                    self.update_download_status(download_id, 'completed', str(download_path))
                 return True
             
             # Fallback: save magnet file
@@ -177,23 +234,29 @@ class BeyTVLocalClient:
             self.update_download_status(download_id, 'failed')
             return False
 
+    def qbittorrent_session(self):
+        """A session logged in to the local qBittorrent, or None"""
+        session = requests.Session()
+        login_url = f"{QBT_URL}/api/v2/auth/login"
+        login_data = {"username": "admin", "password": "adminadmin"}
+        
+        login_response = session.post(login_url, data=login_data, timeout=5)
+        if login_response.status_code != 200:
+            return None
+        return session
+
     def add_to_qbittorrent(self, magnet_url, download_path):
         """Try to add magnet to qBittorrent"""
         if not HAS_REQUESTS:
             return False
             
         try:
-            # Login to qBittorrent
-            session = requests.Session()
-            login_url = "http://localhost:8080/api/v2/auth/login"
-            login_data = {"username": "admin", "password": "adminadmin"}
-            
-            login_response = session.post(login_url, data=login_data, timeout=5)
-            if login_response.status_code != 200:
+            session = self.qbittorrent_session()
+            if session is None:
                 return False
             
             # Add torrent
-            add_url = "http://localhost:8080/api/v2/torrents/add"
+            add_url = f"{QBT_URL}/api/v2/torrents/add"
             add_data = {
                 "urls": magnet_url, 
                 "savepath": str(download_path),
@@ -206,6 +269,55 @@ class BeyTVLocalClient:
         except Exception:
             return False
 
+    def load_active_torrents(self):
+        try:
+            with open(ACTIVE_TORRENTS_FILE) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_active_torrents(self):
+        with open(ACTIVE_TORRENTS_FILE, 'w') as f:
+            json.dump(self.active_torrents, f)
+
+    def check_active_torrents(self):
+        """Report magnets qBittorrent has finished as completed, and ones removed from it
+        or stalled for TORRENT_STALL_SECONDS as failed"""
+        if not HAS_REQUESTS or not self.active_torrents:
+            return
+            
+        try:
+            session = self.qbittorrent_session()
+            if session is None:
+                return
+            hashes = '|'.join(torrent['hash'] for torrent in self.active_torrents.values())
+            response = session.get(f"{QBT_URL}/api/v2/torrents/info", params={'hashes': hashes}, timeout=10)
+            response.raise_for_status()
+            progress = {torrent['hash']: torrent.get('progress', 0) for torrent in response.json()}
+        except Exception as e:
+            # Try again next loop; the heartbeat keeps the leases meanwhile
+            print(f"⚠️  Cannot check qBittorrent downloads: {e}")
+            return
+        
+        for download_id, torrent in list(self.active_torrents.items()):
+            if torrent['hash'] not in progress:
+                print(f"❌ Torrent removed from qBittorrent: {torrent['hash']}")
+                self.update_download_status(int(download_id), 'failed')
+            elif progress[torrent['hash']] >= 1:
+                print(f"✅ qBittorrent finished: {torrent['path']}")
+                self.update_download_status(int(download_id), 'completed', torrent['path'])
+            elif progress[torrent['hash']] > torrent.get('progress', 0) or 'progress_at' not in torrent:
+                torrent.update(progress=progress[torrent['hash']], progress_at=time.time())
+                continue
+            elif time.time() - torrent['progress_at'] > TORRENT_STALL_SECONDS:
+                # Its lease, disk reservation and slot go back to the queue
+                print(f"❌ Torrent stalled, no progress in {TORRENT_STALL_SECONDS // 60} minutes: {torrent['hash']}")
+                self.update_download_status(int(download_id), 'failed')
+            else:
+                continue
+            del self.active_torrents[download_id]
+        self.save_active_torrents()
+
     def open_magnet_file(self, magnet_file):
         """Try to open magnet file with default application"""
         try:
@@ -235,6 +347,7 @@ class BeyTVLocalClient:
                 success = self.download_with_requests(url, filepath)
             else:
                 print(f"❌ No download method available")
+                self.update_download_status(download_id, 'failed')
                 return False
             
             if success:
@@ -262,24 +375,80 @@ class BeyTVLocalClient:
         except Exception:
             return False
 
+    def client_info(self):
+        """What the server needs to know to place work on this machine"""
+        return {
+            'client_id': self.client_id,
+            'downloads_path': str(self.downloads_path),
+            'available_space': shutil.disk_usage(self.downloads_path)[2],  # Free space
+            'max_active': MAX_ACTIVE_DOWNLOADS,
+            'status': 'online',
+            # Leases on anything else ran out with a previous run of this client
+            'working': sorted(self.working | {int(download_id) for download_id in list(self.active_torrents)})
+        }
+
+    def start_heartbeat(self):
+        """Renew this client's leases in the background; downloads block the main loop,
+        so without this a long download would be handed to another client"""
+        thread = threading.Thread(target=self._heartbeat_loop, name='heartbeat', daemon=True)
+        thread.start()
+
+    def _heartbeat_loop(self):
+        # requests sessions are not shared across threads
+        session = requests.Session()
+        while True:
+            interval = HEARTBEAT_SECONDS
+            if self.lease_seconds:
+                interval = min(interval, self.lease_seconds / 3)
+            time.sleep(interval)
+            try:
+                self.post_json('/api/client/heartbeat', self.client_info(), timeout=10, session=session)
+            except Exception as e:
+                print(f"⚠️  Heartbeat failed: {e}")
+
+    def post_json(self, path, payload, timeout, session=None):
+        """POST JSON to the server over a kept-alive session, gzipped if large"""
+        body = json.dumps(payload).encode()
+        headers = {'Content-Type': 'application/json'}
+        if len(body) >= GZIP_MIN_BYTES:
+            body = gzip.compress(body)
+            headers['Content-Encoding'] = 'gzip'
+        session = session or self.session
+        return session.post(f"{self.replit_url}{path}", data=body, headers=headers, timeout=timeout)
+
     def update_download_status(self, download_id, status, local_path=None):
-        """Update download status on server"""
-        if not HAS_REQUESTS:
+        """Report a status change. Completions wait for the next batch; 'downloading'
+        and 'failed' change the lease and are sent straight away"""
+        self.pending_updates.append({
+            'id': download_id,
+            'status': status,
+            'local_path': local_path
+        })
+        if status != 'completed' or time.time() - self.last_flush >= STATUS_BATCH_SECONDS:
+            self.flush_status_updates()
+
+    def flush_status_updates(self):
+        """Send buffered status updates in one request"""
+        self.last_flush = time.time()
+        if not HAS_REQUESTS or not self.pending_updates:
             return
             
+        updates = self.pending_updates
+        self.pending_updates = []
         try:
-            data = {
-                'download_id': download_id,
-                'status': status,
-                'local_path': local_path
-            }
-            requests.post(
-                f"{self.replit_url}/api/client/update-status",
-                json=data,
-                timeout=5
+            response = self.post_json(
+                '/api/client/update-status/batch',
+                {'client_id': self.client_id, 'updates': updates},
+                timeout=10
             )
+            response.raise_for_status()
+            rejected = response.json().get('rejected', 0)
+            if rejected:
+                print(f"⚠️  {rejected} download(s) are no longer leased to this client")
         except Exception as e:
             print(f"❌ Failed to update status: {e}")
+            # Keep them for the next batch
+            self.pending_updates = updates + self.pending_updates
 
     def run(self):
         """Main loop"""
@@ -291,6 +460,9 @@ class BeyTVLocalClient:
         print(f"⏹️  Press Ctrl+C to stop")
         print("=" * 60)
         
+        # Without requests there is no server to send heartbeats to
+        if HAS_REQUESTS:
+            self.start_heartbeat()
         while True:
             try:
                 # Check in and get downloads
@@ -300,16 +472,21 @@ class BeyTVLocalClient:
                     print(f"📥 Found {len(queued_downloads)} queued downloads")
                     for download in queued_downloads:
                         self.download_file(download)
-                elif queued_downloads is not None:
-                    print("🟢 Connected - No downloads queued")
-                else:
+                elif queued_downloads is None:
                     print("🔴 Cannot connect to Replit dashboard")
+                elif not self.long_poll:
+                    print("🟢 Connected - No downloads queued")
+                
+                self.check_active_torrents()
+                self.flush_status_updates()
                 
-                # Wait before next check
-                time.sleep(15)
+                # A long poll already waited on the server; otherwise wait before next check
+                if not self.has_more and not self.long_poll:
+                    time.sleep(15)
                 
             except KeyboardInterrupt:
                 print("\n🛑 Stopping BeyTV Local Client...")
+                self.flush_status_updates()
                 break
             except Exception as e:
                 print(f"❌ Unexpected error: {e}")
@@ -4,25 +4,196 @@ BeyTV Remote Control - qBittorrent Integration
 Complete media management system with real torrent downloads
 """
 
+import io
 import os
+import re
+import copy
 import json
+import gzip
+import calendar
 import sqlite3
 import time
 import shutil
 import subprocess
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import threading
+import itertools
+import functools
+from collections import Counter, OrderedDict, deque, namedtuple
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 import requests
+from requests.adapters import HTTPAdapter
 import feedparser
 from datetime import datetime
+from release_parser import parse_release, parse_size, format_size, find_magnet, parse_infohash
+from beytv_http import make_server, describe_mode, StaticAsset, KeepAliveHandler, PooledHTTPServer, RequestBodyError, GZIP_MIN_BYTES
+from beytv_metrics import MetricsRegistry
+
+# Download queue database
+DB_PATH = os.environ.get('DB_PATH', 'download_queue.db')
+DB_BUSY_TIMEOUT = float(os.environ.get('DB_BUSY_TIMEOUT', 10))
+DB_CACHE_KB = int(os.environ.get('DB_CACHE_KB', 8192))
+
+# Rows handed to a local client per checkin
+CHECKIN_PAGE_SIZE = int(os.environ.get('CHECKIN_PAGE_SIZE', 20))
+CHECKIN_MAX_PAGE_SIZE = 100
+
+# Claimed work returns to the queue if its client stops checking in for this long
+LEASE_SECONDS = float(os.environ.get('LEASE_SECONDS', 900))
+LEASED_STATUSES = ('claimed', 'downloading')
+# What a client may report for a download it holds
+CLIENT_STATUSES = ('downloading', 'completed', 'failed', 'queued')
+
+# Longest a checkin may be held open waiting for work; each waiting
+# client occupies one server worker for that long
+CHECKIN_MAX_WAIT = float(os.environ.get('CHECKIN_MAX_WAIT', 25))
+
+# Finished downloads older than this leave the live queue (0 keeps them forever),
+# moving to downloads_archive unless QUEUE_ARCHIVE=0
+QUEUE_RETENTION_DAYS = float(os.environ.get('QUEUE_RETENTION_DAYS', 30))
+QUEUE_ARCHIVE = os.environ.get('QUEUE_ARCHIVE', '1') != '0'
+QUEUE_MAINTENANCE_INTERVAL = int(os.environ.get('QUEUE_MAINTENANCE_INTERVAL', 3600))
+QUEUE_VACUUM_PAGES = 1000
+QUEUE_PAGE_SIZE = 50
+QUEUE_MAX_PAGE_SIZE = 500
+
+# Dispatch order: priority, plus points per hour waited, minus points per
+# download already active in the same category or for the same requester
+SCHEDULER_AGING_PER_HOUR = float(os.environ.get('SCHEDULER_AGING_PER_HOUR', 1))
+SCHEDULER_FAIR_SHARE_WEIGHT = float(os.environ.get('SCHEDULER_FAIR_SHARE_WEIGHT', 2))
+SCHEDULER_WINDOW = 500
+
+# Free space a client keeps in hand after everything leased to it has landed
+CLIENT_MIN_FREE_BYTES = int(os.environ.get('CLIENT_MIN_FREE_BYTES', 1024 ** 3))
+CLIENT_ONLINE_SECONDS = 60
+
+# Heartbeats live in memory and reach the clients table this often
+CLIENT_FLUSH_INTERVAL = float(os.environ.get('CLIENT_FLUSH_INTERVAL', 10))
+
+# Server-Sent Events; each open stream holds one server worker
+EVENTS_MAX_SUBSCRIBERS = int(os.environ.get('EVENTS_MAX_SUBSCRIBERS', 16))
+EVENTS_POLL_INTERVAL = 1
+EVENTS_KEEPALIVE = 15
+EVENTS_BACKLOG = 1000
+
+# Rendered GET responses shared by every dashboard:
+# path -> (seconds fresh, further seconds served stale while one refresh runs)
+RESPONSE_CACHE_ROUTES = {
+    '/api/qbt-status': (2, 30),
+    # Never stale: the dashboard reloads this right after adding a torrent
+    '/api/qbt-torrents': (2, 0),
+    '/api/local-status': (2, 10),
+    '/api/feeds': (5, 300),
+}
+RESPONSE_CACHE_WAIT = 30
+# Set again for every replay
+RESPONSE_CACHE_SKIP_HEADERS = ('Server', 'Date', 'Content-Length', 'Vary', 'Connection')
+
+# Routes reported by /metrics; any other path counts as 'other'
+METRIC_ROUTES = {
+    '/', '/metrics', '/api/events', '/api/feeds', '/api/feeds/refresh', '/api/feeds/history',
+    '/api/local-status', '/api/qbt-status', '/api/qbt-torrents', '/api/queue',
+    '/api/search', '/api/search/results', '/api/search/stats', '/api/search/stop',
+    '/api/queue-download', '/api/queue-download/batch', '/api/queue/priority', '/api/add-torrent',
+    '/api/client/checkin', '/api/client/heartbeat', '/api/client/update-status', '/api/client/update-status/batch',
+}
+
+# Shared qBittorrent client settings
+QBT_POOL_SIZE = int(os.environ.get('QBT_POOL_SIZE', 10))
+QBT_TIMEOUT = float(os.environ.get('QBT_TIMEOUT', 10))
+QBT_SYNC_INTERVAL = float(os.environ.get('QBT_SYNC_INTERVAL', 2))
+
+# Background plugin search settings
+SEARCH_TIMEOUT = float(os.environ.get('SEARCH_TIMEOUT', 30))
+SEARCH_POLL_INTERVAL = float(os.environ.get('SEARCH_POLL_INTERVAL', 0.5))
+SEARCH_JOB_TTL = float(os.environ.get('SEARCH_JOB_TTL', 300))
+SEARCH_CACHE_TTL = float(os.environ.get('SEARCH_CACHE_TTL', 600))
+SEARCH_CACHE_MAX_ENTRIES = int(os.environ.get('SEARCH_CACHE_MAX_ENTRIES', 128))
+SEARCH_CACHE_MAX_BYTES = int(os.environ.get('SEARCH_CACHE_MAX_BYTES', 8 * 1024 * 1024))
+
+# RSS feed fetch settings
+RSS_WORKERS = int(os.environ.get('RSS_WORKERS', 6))
+RSS_CONNECT_TIMEOUT = float(os.environ.get('RSS_CONNECT_TIMEOUT', 3))
+RSS_READ_TIMEOUT = float(os.environ.get('RSS_READ_TIMEOUT', 10))
+RSS_DEADLINE = float(os.environ.get('RSS_DEADLINE', 12))
+RSS_CACHE_FILE = os.environ.get('RSS_CACHE_FILE', 'cache/feeds.json')
+RSS_REFRESH_INTERVAL = float(os.environ.get('RSS_REFRESH_INTERVAL', 300))
+RSS_FEED_LIMIT = 20      # items kept per feed for /api/feeds/<name>
+RSS_COMBINED_LIMIT = 8   # items per feed in the combined /api/feeds view
+FEED_INDEX_DB = os.environ.get('FEED_INDEX_DB', 'feed_index.db')
+
+metrics = MetricsRegistry()
+REQUEST_LATENCY = metrics.histogram(
+    'beytv_http_request_duration_seconds', 'Time to answer an HTTP request', ('route', 'method', 'status'))
+UPSTREAM_LATENCY = metrics.histogram(
+    'beytv_upstream_duration_seconds', 'Time spent in calls to qBittorrent, RSS feeds and SQLite',
+    ('dependency', 'operation'))
+UPSTREAM_ERRORS = metrics.counter(
+    'beytv_upstream_errors_total', 'Failed calls to qBittorrent, RSS feeds and SQLite', ('dependency', 'operation'))
+
+@contextmanager
+def upstream_call(dependency, operation):
+    """Time a call to a dependency, counting it as an error if it raises"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        UPSTREAM_ERRORS.inc(dependency, operation)
+        raise
+    finally:
+        UPSTREAM_LATENCY.observe(time.perf_counter() - started, dependency, operation)
+
+def lazy_singleton(factory):
+    """Turn `factory` into a getter for one process-wide instance, made on first call"""
+    lock = threading.Lock()
+    instance = None
+    
+    @functools.wraps(factory)
+    def get():
+        nonlocal instance
+        if instance is None:
+            with lock:
+                if instance is None:
+                    instance = factory()
+        return instance
+    return get
+
+class BackgroundService:
+    """Base for helpers that do their work in `_run` on one daemon thread"""
+    thread_name = None
+    _thread = None
+    _start_lock = threading.Lock()
+    
+    def start(self):
+        """Start the background thread once"""
+        with BackgroundService._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+                self._thread.start()
+        return self
 
 class QBittorrentAPI:
     """qBittorrent Web API wrapper for real torrent downloads"""
     
     def __init__(self, host='localhost', port=8080, username='admin', password='adminadmin'):
         self.base_url = f'http://{host}:{port}'
-        self.session = requests.Session()
+        self.username = username
+        self.password = password
         self.logged_in = False
+        self._login_lock = threading.Lock()
+        self.mirror = TorrentMirror(self)
+        self.searches = {}
+        self.search_cache = SearchCache()
+        self._search_ids = itertools.count(1)
+        self._search_lock = threading.Lock()
+        
+        # Keep-alive connection pool shared by every request handler thread
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=QBT_POOL_SIZE)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         
         # Auto-login
         try:
@@ -30,106 +201,426 @@ class QBittorrentAPI:
         except:
             print(f"⚠️ qBittorrent not connected at {self.base_url}")
     
-    def login(self, username, password):
+    def login(self, username=None, password=None):
         """Login to qBittorrent Web UI"""
-        login_data = {'username': username, 'password': password}
-        response = self.session.post(f'{self.base_url}/api/v2/auth/login', data=login_data)
+        login_data = {'username': username or self.username, 'password': password or self.password}
+        with upstream_call('qbittorrent', '/api/v2/auth/login'):
+            response = self.session.post(f'{self.base_url}/api/v2/auth/login', data=login_data,
+                                         timeout=QBT_TIMEOUT)
         
         if response.status_code == 200 and response.text == 'Ok.':
             self.logged_in = True
             print(f"✅ Connected to qBittorrent at {self.base_url}")
             return True
         else:
+            self.logged_in = False
             raise Exception(f"qBittorrent login failed: {response.text}")
     
-    def search(self, query, plugins='all', category='all'):
-        """Search torrents using qBittorrent plugins"""
+    def _relogin(self, stale_sid):
+        """Re-authenticate once, even if several threads hit a 403 together"""
+        with self._login_lock:
+            # Another thread already refreshed the SID cookie
+            if self.logged_in and self.session.cookies.get('SID') != stale_sid:
+                return
+            self.login()
+    
+    def _request(self, method, path, **kwargs):
+        """Send an API request, reusing the SID cookie and re-authenticating on 403"""
         if not self.logged_in:
-            return []
+            self._relogin(None)
+        
+        kwargs.setdefault('timeout', QBT_TIMEOUT)
+        sid = self.session.cookies.get('SID')
+        with upstream_call('qbittorrent', path):
+            response = self.session.request(method, f'{self.base_url}{path}', **kwargs)
         
+        if response.status_code == 403:
+            self._relogin(sid)
+            with upstream_call('qbittorrent', path):
+                response = self.session.request(method, f'{self.base_url}{path}', **kwargs)
+        
+        if response.status_code >= 400:
+            UPSTREAM_ERRORS.inc('qbittorrent', path)
+        return response
+    
+    def start_search(self, query, plugins='all', category='all'):
+        """Start a plugin search in the background and return its job"""
+        job = SearchJob(next(self._search_ids), self, query, plugins, category)
+        
+        # Repeated searches are answered from the cache without touching the plugins
+        cached = self.search_cache.get(SearchCache.key(query, plugins, category))
+        if cached is not None:
+            job.complete(cached)
+        else:
+            job.start()
+        
+        with self._search_lock:
+            # Forget jobs nobody has polled for a while
+            cutoff = time.time() - SEARCH_JOB_TTL
+            for job_id in [j.id for j in self.searches.values() if j.finished and j.finished < cutoff]:
+                del self.searches[job_id]
+            self.searches[job.id] = job
+        
+        return job
+    
+    def get_search(self, job_id):
+        """Look up a search job by id"""
+        return self.searches.get(job_id)
+    
+    def search(self, query, plugins='all', category='all'):
+        """Search torrents using qBittorrent plugins, waiting for them to finish"""
         try:
-            # Start search
-            search_data = {
-                'pattern': query,
-                'plugins': plugins,
-                'category': category
-            }
-            
-            response = self.session.post(f'{self.base_url}/api/v2/search/start', data=search_data)
-            
-            if response.status_code != 200:
-                return []
-            
-            search_id = response.json().get('id')
-            if not search_id:
-                return []
-            
-            # Wait a bit for results
-            time.sleep(2)
-            
-            # Get results
-            results_response = self.session.get(f'{self.base_url}/api/v2/search/results', 
-                                             params={'id': search_id})
-            
-            if results_response.status_code == 200:
-                data = results_response.json()
-                return data.get('results', [])
-            
-            return []
-            
+            job = self.start_search(query, plugins, category)
         except Exception as e:
             print(f"Search error: {e}")
             return []
+        
+        job.done.wait(SEARCH_TIMEOUT + QBT_TIMEOUT)
+        return list(job.results)
     
     def add_torrent(self, url, save_path=None):
         """Add torrent to qBittorrent"""
-        if not self.logged_in:
-            return False
-        
         try:
             data = {'urls': url}
             if save_path:
                 data['savepath'] = save_path
             
-            response = self.session.post(f'{self.base_url}/api/v2/torrents/add', data=data)
+            response = self._request('POST', '/api/v2/torrents/add', data=data)
             return response.status_code == 200
             
         except Exception as e:
             print(f"Add torrent error: {e}")
             return False
     
+    def has_torrent(self, infohash):
+        """Whether qBittorrent already holds `infohash`, checked against a fresh sync"""
+        self.mirror.sync(force=True)
+        return self.mirror.connected and infohash in self.mirror.torrents
+    
+    def sync_maindata(self, rid=0):
+        """Fetch the changes since response id `rid` from qBittorrent"""
+        response = self._request('GET', '/api/v2/sync/maindata', params={'rid': rid})
+        response.raise_for_status()
+        return response.json()
+    
     def get_torrents(self):
         """Get list of all torrents"""
-        if not self.logged_in:
-            return []
-        
-        try:
-            response = self.session.get(f'{self.base_url}/api/v2/torrents/info')
-            if response.status_code == 200:
-                return response.json()
-            return []
-        except:
-            return []
+        return self.mirror.get_torrents()
     
     def get_status(self):
         """Get qBittorrent status"""
-        if not self.logged_in:
+        return self.mirror.get_status()
+
+class TorrentMirror:
+    """In-memory torrent table kept current from qBittorrent sync/maindata deltas"""
+    
+    def __init__(self, qbt, min_interval=None):
+        self.qbt = qbt
+        self.min_interval = QBT_SYNC_INTERVAL if min_interval is None else min_interval
+        self.rid = 0
+        self.torrents = {}
+        self.server_state = {}
+        self.connected = False
+        self.last_sync = 0
+        self._snapshot = []
+        self._lock = threading.Lock()
+    
+    def sync(self, force=False):
+        """Poll maindata at most once per interval, however many handlers are asking"""
+        if not force and time.time() - self.last_sync < self.min_interval:
+            return
+        with self._lock:
+            if not force and time.time() - self.last_sync < self.min_interval:
+                return
+            try:
+                data = self.qbt.sync_maindata(self.rid)
+                self.connected = True
+                self.apply(data)
+            except Exception as e:
+                if self.connected:
+                    print(f"⚠️ qBittorrent sync failed: {e}")
+                    events.publish('qbt-status', {'connected': False})
+                # Start over with a full update once qBittorrent is back
+                self.connected = False
+                self.rid = 0
+            self.last_sync = time.time()
+    
+    def apply(self, data):
+        """Merge one maindata response into the table"""
+        changed = False
+        if data.get('full_update'):
+            self.torrents = {}
+            self.server_state = {}
+            changed = True
+        
+        for torrent_hash, fields in data.get('torrents', {}).items():
+            self.torrents.setdefault(torrent_hash, {'hash': torrent_hash}).update(fields)
+            changed = True
+        
+        for torrent_hash in data.get('torrents_removed', []):
+            if self.torrents.pop(torrent_hash, None) is not None:
+                changed = True
+        
+        self.server_state.update(data.get('server_state', {}))
+        self.rid = data.get('rid', self.rid)
+        
+        # Readers get a fresh list only when something actually changed
+        if changed:
+            self._snapshot = [dict(t) for t in self.torrents.values()]
+        
+        if events.subscribers:
+            if data.get('full_update'):
+                events.publish('torrents', {'full': True, 'torrents': self.torrents, 'removed': []})
+            elif changed:
+                events.publish('torrents', {'full': False, 'torrents': data.get('torrents', {}),
+                                            'removed': data.get('torrents_removed', [])})
+            if changed or data.get('server_state'):
+                events.publish('qbt-status', self.status())
+    
+    def get_torrents(self):
+        """Current torrent list, as /api/v2/torrents/info would return it"""
+        self.sync()
+        return self._snapshot if self.connected else []
+    
+    def get_status(self):
+        """Transfer speeds and torrent count from the mirrored server state"""
+        self.sync()
+        return self.status()
+    
+    def status(self):
+        if not self.connected:
             return {'connected': False}
+        return {
+            'connected': True,
+            'active_torrents': len(self._snapshot),
+            'download_speed': self.server_state.get('dl_info_speed', 0),
+            'upload_speed': self.server_state.get('up_info_speed', 0)
+        }
+
+class SearchCache:
+    """Bounded TTL/LRU cache of finished plugin searches"""
+    
+    def __init__(self, ttl=None, max_entries=None, max_bytes=None):
+        self.ttl = SEARCH_CACHE_TTL if ttl is None else ttl
+        self.max_entries = SEARCH_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.max_bytes = SEARCH_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def key(query, plugins='all', category='all'):
+        """Normalize case and whitespace so trivially different queries share an entry"""
+        return (' '.join(query.lower().split()), plugins, category)
+    
+    def get(self, key):
+        """Cached results for `key`, or None when missing or expired"""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry and time.time() - entry[0] < self.ttl:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                self._evict(key)
+            self.misses += 1
+            return None
+    
+    def put(self, key, results):
+        """Store results, evicting least recently used entries to stay in bounds"""
+        size = len(json.dumps(results))
+        if self.ttl <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self.entries:
+                self._evict(key)
+            self.entries[key] = (time.time(), results, size)
+            self.bytes += size
+            while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._evict(next(iter(self.entries)))
+    
+    def _evict(self, key):
+        self.bytes -= self.entries.pop(key)[2]
+    
+    def stats(self):
+        """Hit/miss counters and current size"""
+        return {
+            'entries': len(self.entries),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'ttl': self.ttl
+        }
+
+CachedResponse = namedtuple('CachedResponse', 'status headers body gzipped stored_at')
+
+class ResponseCache:
+    """Single-flight cache of rendered GET responses. Concurrent requests for the
+    same route share one render, and an expired copy keeps being served for a
+    while as a single background refresh replaces it"""
+    
+    def __init__(self):
+        self.entries = {}
+        self._inflight = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key, ttl, stale_ttl, render):
+        """Cached response for `key`, calling `render()` at most once at a time to fill it"""
+        while True:
+            with self._lock:
+                entry = self.entries.get(key)
+                age = time.time() - entry.stored_at if entry else None
+                if entry and age < ttl:
+                    return entry
+                
+                inflight = self._inflight.get(key)
+                if entry and age < ttl + stale_ttl:
+                    # Stale while revalidate
+                    if inflight is None:
+                        self._inflight[key] = threading.Event()
+                        threading.Thread(target=self._fill, args=(key, render), daemon=True).start()
+                    return entry
+                
+                leader = inflight is None
+                if leader:
+                    inflight = self._inflight[key] = threading.Event()
+            
+            if leader:
+                return self._fill(key, render)
+            # Another request is rendering; use its result, or take over if it failed
+            inflight.wait(RESPONSE_CACHE_WAIT)
+    
+    def invalidate(self, *keys):
+        """Drop the cached copies of `keys`; renders already running are not stored"""
+        with self._lock:
+            for key in keys:
+                self.entries.pop(key, None)
+                self._generations[key] = self._generations.get(key, 0) + 1
+    
+    def _fill(self, key, render):
+        generation = self._generations.get(key, 0)
+        try:
+            response = render()
+            if response.status == 200:
+                with self._lock:
+                    if self._generations.get(key, 0) == generation:
+                        self.entries[key] = response
+            return response
+        finally:
+            with self._lock:
+                self._inflight.pop(key).set()
+
+response_cache = ResponseCache()
+
+# Dashboard page, compressed once at import
+DASHBOARD = StaticAsset('dashboard.html')
+
+class SearchJob:
+    """One qBittorrent plugin search, polled in the background until the plugins finish"""
+    
+    def __init__(self, job_id, qbt, query, plugins='all', category='all'):
+        self.id = job_id
+        self.qbt = qbt
+        self.query = query
+        self.plugins = plugins
+        self.category = category
+        self.search_id = None
+        self.status = 'Running'
+        self.total = 0
+        self.results = []
+        self.cached = False
+        self.finished = None
+        self.done = threading.Event()
+        self._stop = threading.Event()
+    
+    def start(self):
+        """Ask qBittorrent to start searching and begin polling"""
+        search_data = {
+            'pattern': self.query,
+            'plugins': self.plugins,
+            'category': self.category
+        }
+        response = self.qbt._request('POST', '/api/v2/search/start', data=search_data)
+        response.raise_for_status()
+        self.search_id = response.json()['id']
         
+        threading.Thread(target=self._poll, name=f'search-{self.id}', daemon=True).start()
+    
+    def complete(self, results):
+        """Finish immediately with cached results"""
+        self.results = list(results)
+        self.total = len(self.results)
+        self.cached = True
+        self.status = 'Stopped'
+        self.finished = time.time()
+        self.done.set()
+    
+    def stop(self):
+        """Stop the search early, keeping whatever results arrived so far"""
+        self._stop.set()
+    
+    def _poll(self):
+        deadline = time.time() + SEARCH_TIMEOUT
         try:
-            response = self.session.get(f'{self.base_url}/api/v2/transfer/info')
-            if response.status_code == 200:
-                data = response.json()
-                torrents = self.get_torrents()
-                return {
-                    'connected': True,
-                    'active_torrents': len(torrents),
-                    'download_speed': data.get('dl_info_speed', 0),
-                    'upload_speed': data.get('up_info_speed', 0)
-                }
-            return {'connected': False}
-        except:
-            return {'connected': False}
+            while True:
+                response = self.qbt._request('GET', '/api/v2/search/status', params={'id': self.search_id})
+                response.raise_for_status()
+                status = response.json()
+                running = bool(status) and status[0].get('status') == 'Running'
+                total = status[0].get('total', 0) if status else 0
+                
+                # Only fetch results we have not seen yet
+                if total > len(self.results) or not running:
+                    response = self.qbt._request('GET', '/api/v2/search/results',
+                                                 params={'id': self.search_id, 'offset': len(self.results)})
+                    response.raise_for_status()
+                    self.results.extend(response.json().get('results', []))
+                self.total = len(self.results)
+                
+                if not running:
+                    # Only complete result sets are worth caching
+                    self.qbt.search_cache.put(SearchCache.key(self.query, self.plugins, self.category),
+                                              list(self.results))
+                    break
+                if time.time() >= deadline or self._stop.wait(SEARCH_POLL_INTERVAL):
+                    self.qbt._request('POST', '/api/v2/search/stop', data={'id': self.search_id})
+                    break
+            self.status = 'Stopped'
+        except Exception as e:
+            print(f"Search error: {e}")
+            self.status = 'Failed'
+        finally:
+            try:
+                self.qbt._request('POST', '/api/v2/search/delete', data={'id': self.search_id})
+            except Exception:
+                pass
+            self.finished = time.time()
+            self.done.set()
+    
+    def page(self, offset=0):
+        """Results from `offset` onwards, for incremental polling"""
+        return {
+            'id': self.id,
+            'query': self.query,
+            'status': self.status,
+            'cached': self.cached,
+            'total': self.total,
+            'offset': offset,
+            'results': self.results[offset:]
+        }
+
+@lazy_singleton
+def get_qbt_client():
+    """Return the process-wide qBittorrent client, creating it on first use"""
+    return QBittorrentAPI(
+        host=os.environ.get('QBT_HOST', 'localhost'),
+        port=int(os.environ.get('QBT_PORT', 8080)),
+        username=os.environ.get('QBT_USERNAME', 'admin'),
+        password=os.environ.get('QBT_PASSWORD', 'adminadmin')
+    )
 
 class RSSManager:
     """RSS feed manager for automatic torrent discovery"""
@@ -150,27 +641,58 @@ class RSSManager:
             return []
         
         try:
-            feed = feedparser.parse(self.feeds[feed_name])
-            items = []
-            
-            for entry in feed.entries[:limit]:
-                # Extract torrent info from RSS entry
-                item = {
-                    'title': entry.title,
-                    'description': getattr(entry, 'description', ''),
-                    'link': entry.link,
-                    'magnet': self.extract_magnet(entry),
-                    'size': self.extract_size(entry),
-                    'published': getattr(entry, 'published', ''),
-                    'source': feed_name
-                }
-                items.append(item)
-            
-            return items
+            return self.fetch_feed(feed_name, limit)
         except Exception as e:
             print(f"RSS feed error for {feed_name}: {e}")
             return []
     
+    def fetch_feed(self, feed_name, limit=10):
+        """Download and parse one feed with connect/read timeouts, raising on failure"""
+        url = self.feeds[feed_name]
+        cached = _feed_cache.get(url)
+        
+        # Revalidate instead of re-downloading when the server gave us validators
+        headers = {}
+        if cached and cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached and cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+        
+        response = _feed_session.get(url, headers=headers,
+                                     timeout=(RSS_CONNECT_TIMEOUT, RSS_READ_TIMEOUT))
+        if response.status_code == 304 and cached:
+            return cached['items'][:limit]
+        response.raise_for_status()
+        
+        items = self.parse_feed(feed_name, response)
+        _feed_cache.put(url, response.headers.get('ETag'), response.headers.get('Last-Modified'), items)
+        return items[:limit]
+    
+    def parse_feed(self, feed_name, response):
+        """Parse every entry of a downloaded feed"""
+        feed = feedparser.parse(response.content, response_headers=dict(response.headers))
+        items = []
+        
+        for entry in feed.entries:
+            # Extract torrent info from RSS entry
+            item = {
+                'title': entry.title,
+                'description': getattr(entry, 'description', ''),
+                'link': entry.link,
+                'magnet': self.extract_magnet(entry),
+                'size_bytes': self.extract_size(entry),
+                'published': getattr(entry, 'published', ''),
+                'source': feed_name
+            }
+            item['size'] = format_size(item['size_bytes'])
+            item['infohash'] = parse_infohash(item['magnet'])
+            item['release'] = parse_release(entry.title).as_dict()
+            published_parsed = getattr(entry, 'published_parsed', None)
+            item['published_ts'] = calendar.timegm(published_parsed) if published_parsed else None
+            items.append(item)
+        
+        return items
+    
     def extract_magnet(self, entry):
         """Extract magnet link from RSS entry"""
         # Check various possible locations for magnet links
@@ -180,44 +702,49 @@ class RSSManager:
                     return enclosure.href
         
         # Check in description
-        description = getattr(entry, 'description', '')
-        if 'magnet:' in description:
-            import re
-            magnet_match = re.search(r'magnet:\?[^"<>\s]+', description)
-            if magnet_match:
-                return magnet_match.group(0)
-        
-        # Fallback to entry link if it's a magnet
-        if hasattr(entry, 'link') and entry.link.startswith('magnet:'):
-            return entry.link
+        magnet = find_magnet(getattr(entry, 'description', ''))
+        if magnet:
+            return magnet
         
-        return entry.link  # Fallback to regular link
+        return entry.link  # Regular link, or a magnet itself
     
     def extract_size(self, entry):
-        """Extract file size from RSS entry"""
-        # Look for size in various formats
-        description = getattr(entry, 'description', '')
-        
-        import re
-        size_patterns = [
-            r'(\d+\.?\d*)\s*(GB|MB|TB)',
-            r'Size:\s*(\d+\.?\d*)\s*(GB|MB|TB)',
-            r'(\d+\.?\d*)\s*(GiB|MiB|TiB)'
-        ]
-        
-        for pattern in size_patterns:
-            match = re.search(pattern, description, re.IGNORECASE)
-            if match:
-                return f"{match.group(1)} {match.group(2)}"
-        
-        return "Unknown"
+        """Extract file size in bytes from RSS entry description or title"""
+        size_bytes = parse_size(getattr(entry, 'description', ''))
+        if size_bytes is None:
+            size_bytes = parse_release(entry.title).size_bytes
+        return size_bytes
     
     def get_all_feeds(self, limit_per_feed=5):
         """Get items from all RSS feeds"""
+        return self.fetch_all(limit_per_feed)['items']
+    
+    def fetch_all(self, limit_per_feed=5, deadline=None):
+        """Fetch every feed in parallel, returning the items that arrived in time
+        plus per-feed latency and error info"""
+        deadline = RSS_DEADLINE if deadline is None else deadline
+        started = time.time()
+        futures = {
+            _feed_pool.submit(self._timed_fetch, feed_name, limit_per_feed): feed_name
+            for feed_name in self.feeds
+        }
+        done, not_done = wait(futures, timeout=deadline)
+        
         all_items = []
-        for feed_name in self.feeds:
-            items = self.get_feed_items(feed_name, limit_per_feed)
+        feeds = {}
+        for future in done:
+            items, status = future.result()
             all_items.extend(items)
+            feeds[futures[future]] = status
+        
+        for future in not_done:
+            future.cancel()
+            feeds[futures[future]] = {
+                'ok': False,
+                'count': 0,
+                'latency_ms': round((time.time() - started) * 1000),
+                'error': f'Timed out after {deadline}s'
+            }
         
         # Sort by most recent
         try:
@@ -225,33 +752,905 @@ class RSSManager:
         except:
             pass
         
-        return all_items
+        # Report feeds in configured order
+        return {'items': all_items, 'feeds': {name: feeds[name] for name in self.feeds}}
+    
+    def _timed_fetch(self, feed_name, limit):
+        started = time.time()
+        try:
+            with upstream_call('rss', feed_name):
+                items = self.fetch_feed(feed_name, limit)
+            error = None
+        except Exception as e:
+            print(f"RSS feed error for {feed_name}: {e}")
+            items = []
+            error = str(e)
+        
+        status = {
+            'ok': error is None,
+            'count': len(items),
+            'latency_ms': round((time.time() - started) * 1000),
+            'error': error
+        }
+        return items, status
 
-class BeyTVServer(BaseHTTPRequestHandler):
+class FeedCache:
+    """Validators and parsed items per feed URL, persisted to a JSON file"""
+    
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+        
+        try:
+            with open(path) as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            pass
+    
+    def get(self, url):
+        return self.entries.get(url)
+    
+    def put(self, url, etag, last_modified, items):
+        with self._lock:
+            self.entries[url] = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'items': items,
+                'fetched_at': datetime.now().isoformat()
+            }
+            self.save()
+    
+    def save(self):
+        """Write atomically so a crash never leaves a truncated cache"""
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f'{self.path}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ Could not save feed cache: {e}")
+
+class FeedIndex:
+    """Every feed item ever seen, keyed by infohash, with full-text title search"""
+    
+    def __init__(self, path):
+        self.path = path
+        self.db = Database(path, FEED_INDEX_MIGRATIONS, row_factory=sqlite3.Row)
+    
+    def add_items(self, items):
+        """Insert new items and refresh last_seen on known ones, in one transaction"""
+        rows = [
+            (item['infohash'], item['title'], item['magnet'], item.get('link'),
+             item.get('size_bytes'), item.get('published_ts'), item.get('source'))
+            for item in items if item.get('infohash')
+        ]
+        if not rows:
+            return 0
+        
+        conn = self.db.connection()
+        with conn:
+            conn.executemany('''
+                INSERT INTO feed_items (infohash, title, magnet, link, size_bytes, published, source)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (infohash) DO UPDATE SET last_seen = CURRENT_TIMESTAMP
+            ''', rows)
+        return len(rows)
+    
+    def search(self, query, limit=50):
+        """Best title matches for `query`, every word matched as a prefix"""
+        terms = re.findall(r'\w+', query)
+        if not terms:
+            return []
+        match = ' '.join(f'"{term}"*' for term in terms)
+        
+        rows = self.db.connection().execute('''
+            SELECT feed_items.* FROM feed_items_fts
+            JOIN feed_items ON feed_items.rowid = feed_items_fts.rowid
+            WHERE feed_items_fts MATCH ?
+            ORDER BY bm25(feed_items_fts), feed_items.published DESC
+            LIMIT ?
+        ''', (match, limit)).fetchall()
+        return [self.to_result(row) for row in rows]
+    
+    def history(self, source=None, before=None, limit=50):
+        """Items newest first, optionally for one feed and older than `before`"""
+        sql = 'SELECT * FROM feed_items WHERE 1 = 1'
+        params = []
+        if source:
+            sql += ' AND source = ?'
+            params.append(source)
+        if before:
+            sql += ' AND published < ?'
+            params.append(before)
+        sql += ' ORDER BY published DESC LIMIT ?'
+        params.append(limit)
+        
+        rows = self.db.connection().execute(sql, params).fetchall()
+        return [self.to_result(row) for row in rows]
+    
+    @staticmethod
+    def to_result(row):
+        """Shape a row like a search result the dashboard already renders"""
+        return {
+            'title': row['title'],
+            'url': row['magnet'],
+            'link': row['link'],
+            'infohash': row['infohash'],
+            'size': row['size_bytes'],
+            'published': row['published'],
+            'source': row['source'],
+            'local': True
+        }
+
+# Feed downloads share one keep-alive session and a bounded worker pool
+_feed_session = requests.Session()
+_feed_session.headers['User-Agent'] = feedparser.USER_AGENT
+_feed_session.mount('http://', HTTPAdapter(pool_maxsize=RSS_WORKERS))
+_feed_session.mount('https://', HTTPAdapter(pool_maxsize=RSS_WORKERS))
+_feed_pool = ThreadPoolExecutor(max_workers=RSS_WORKERS, thread_name_prefix='rss')
+_feed_cache = FeedCache(RSS_CACHE_FILE)
+
+FeedSnapshot = namedtuple('FeedSnapshot', 'all_json feed_json refreshed_at')
+
+class FeedRefresher(BackgroundService):
+    """Refreshes every feed in the background and publishes an immutable snapshot
+    of pre-serialized responses, so feed requests never wait on the network"""
+    thread_name = 'feed-refresher'
+    
+    def __init__(self, rss=None, interval=None):
+        self.rss = rss or RSSManager()
+        self.index = FeedIndex(FEED_INDEX_DB)
+        self.interval = RSS_REFRESH_INTERVAL if interval is None else interval
+        self.snapshot = FeedSnapshot(json.dumps({'items': [], 'feeds': {}, 'refreshed_at': None}).encode(),
+                                     {}, None)
+        self._seen_links = None
+        self._wake = threading.Event()
+    
+    def trigger(self):
+        """Ask for a refresh soon without waiting for it"""
+        self._wake.set()
+    
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"RSS refresh error: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+    
+    def refresh(self):
+        """Fetch all feeds and swap in a new snapshot"""
+        result = self.rss.fetch_all(limit_per_feed=RSS_FEED_LIMIT)
+        refreshed_at = datetime.now().isoformat()
+        
+        try:
+            self.index.add_items(result['items'])
+        except sqlite3.Error as e:
+            print(f"⚠️ Could not index feed items: {e}")
+        
+        by_feed = {feed_name: [] for feed_name in self.rss.feeds}
+        for item in result['items']:
+            by_feed[item['source']].append(item)
+        
+        # The combined view shows the newest few items of each feed
+        combined = [item for items in by_feed.values() for item in items[:RSS_COMBINED_LIMIT]]
+        combined.sort(key=lambda x: x['published'], reverse=True)
+        
+        self.snapshot = FeedSnapshot(
+            json.dumps({'items': combined, 'feeds': result['feeds'], 'refreshed_at': refreshed_at}).encode(),
+            {feed_name: json.dumps(items).encode() for feed_name, items in by_feed.items()},
+            refreshed_at
+        )
+        print(f"📡 Refreshed {len(result['items'])} RSS items")
+        
+        # Tell open dashboards about items the previous crawl did not have
+        links = {item['link'] for item in result['items']}
+        if self._seen_links is not None:
+            new_items = [item for item in result['items'] if item['link'] not in self._seen_links]
+            if new_items:
+                events.publish('feeds', {'refreshed_at': refreshed_at, 'items': new_items[:50]})
+        self._seen_links = links
+
+@lazy_singleton
+def get_feed_refresher():
+    """Return the process-wide feed refresher, starting it on first use"""
+    return FeedRefresher().start()
+
+class TimedConnection(sqlite3.Connection):
+    """SQLite connection that reports statement latency and errors to /metrics,
+    labelled by the statement's leading keyword"""
+    
+    def execute(self, sql, *args):
+        with upstream_call('sqlite', sql.split(None, 1)[0].upper()):
+            return super().execute(sql, *args)
+    
+    def executemany(self, sql, *args):
+        with upstream_call('sqlite', sql.split(None, 1)[0].upper()):
+            return super().executemany(sql, *args)
+
+class Database:
+    """Persistent per-thread SQLite connections with WAL journaling and
+    versioned schema migrations tracked in PRAGMA user_version"""
+    
+    def __init__(self, path, migrations, row_factory=None):
+        self.path = path
+        self.migrations = migrations
+        self.row_factory = row_factory
+        self.migrated = False
+        self._local = threading.local()
+        self._migrate_lock = threading.Lock()
+    
+    def connection(self):
+        """This thread's connection, opened on first use, with the schema migrated"""
+        conn = self._connection()
+        if not self.migrated:
+            self.migrate()
+        return conn
+    
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=DB_BUSY_TIMEOUT, factory=TimedConnection)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(f'PRAGMA busy_timeout={int(DB_BUSY_TIMEOUT * 1000)}')
+            conn.execute(f'PRAGMA cache_size=-{DB_CACHE_KB}')
+            conn.row_factory = self.row_factory
+            self._local.conn = conn
+        return conn
+    
+    def migrate(self):
+        """Apply migrations newer than the database's user_version, once per process.
+        A failing migration is rolled back and raised, so startup stops there"""
+        with self._migrate_lock:
+            if self.migrated:
+                return
+            conn = self._connection()
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            for number, script in enumerate(self.migrations[version:], start=version + 1):
+                try:
+                    if callable(script):
+                        # Steps written in Python get the same one-transaction treatment
+                        conn.execute('BEGIN')
+                        script(conn)
+                        conn.execute(f'PRAGMA user_version = {number}')
+                        conn.commit()
+                    else:
+                        conn.executescript(f'BEGIN; {script}; PRAGMA user_version = {number}; COMMIT;')
+                except Exception as e:
+                    # executescript leaves the failed BEGIN open on this connection
+                    if conn.in_transaction:
+                        conn.rollback()
+                    print(f"❌ Migration {number} of {self.path} failed: {e}")
+                    raise
+                print(f"🗄️ Migrated {self.path} to schema version {number}")
+            self.migrated = True
+
+def backfill_torrent_hashes(conn):
+    """Key rows queued before migration 4 by infohash, so queueing one of them again
+    is caught as a duplicate. When several rows hold one torrent the first keeps it"""
+    taken = {torrent_hash for (torrent_hash,) in conn.execute(
+        'SELECT torrent_hash FROM downloads WHERE torrent_hash IS NOT NULL'
+    )}
+    updates = []
+    for download_id, url in conn.execute('SELECT id, url FROM downloads WHERE torrent_hash IS NULL ORDER BY id').fetchall():
+        torrent_hash = parse_infohash(url)
+        if torrent_hash and torrent_hash not in taken:
+            taken.add(torrent_hash)
+            updates.append((torrent_hash, download_id))
+    conn.executemany('UPDATE downloads SET torrent_hash = ? WHERE id = ?', updates)
+
+QUEUE_MIGRATIONS = [
+    # 1: downloads queue and client tracking
+    '''
+    CREATE TABLE IF NOT EXISTS downloads (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        url TEXT NOT NULL,
+        status TEXT DEFAULT 'queued',
+        queued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        local_path TEXT,
+        torrent_hash TEXT,
+        qbt_host TEXT,
+        qbt_port INTEGER
+    );
+    CREATE TABLE IF NOT EXISTS clients (
+        client_id TEXT PRIMARY KEY,
+        last_seen TIMESTAMP,
+        status TEXT
+    )
+    ''',
+    # 2: change sequence for delta checkins, and indexes for status scans
+    '''
+    ALTER TABLE downloads ADD COLUMN updated_seq INTEGER NOT NULL DEFAULT 0;
+    CREATE TABLE queue_seq (id INTEGER PRIMARY KEY CHECK (id = 1), seq INTEGER NOT NULL);
+    INSERT INTO queue_seq (id, seq) SELECT 1, COALESCE(MAX(id), 0) FROM downloads;
+    UPDATE downloads SET updated_seq = id;
+    
+    -- Every insert and state change takes the next sequence number
+    CREATE TRIGGER downloads_seq_insert AFTER INSERT ON downloads BEGIN
+        UPDATE queue_seq SET seq = seq + 1;
+        UPDATE downloads SET updated_seq = (SELECT seq FROM queue_seq) WHERE id = new.id;
+    END;
+    CREATE TRIGGER downloads_seq_update AFTER UPDATE OF status, local_path ON downloads BEGIN
+        UPDATE queue_seq SET seq = seq + 1;
+        UPDATE downloads SET updated_seq = (SELECT seq FROM queue_seq) WHERE id = new.id;
+    END;
+    
+    CREATE INDEX downloads_status_queued_at ON downloads (status, queued_at);
+    CREATE INDEX downloads_status_seq ON downloads (status, updated_seq)
+    ''',
+    # 3: leases so several local clients can share one queue
+    '''
+    ALTER TABLE downloads ADD COLUMN claimed_by TEXT;
+    ALTER TABLE downloads ADD COLUMN lease_expires REAL;
+    CREATE INDEX downloads_claimed_by ON downloads (claimed_by, status)
+    ''',
+    # 4: one queue row per torrent, keyed by canonical hex infohash
+    '''
+    UPDATE downloads SET torrent_hash = NULL WHERE torrent_hash = '';
+    CREATE UNIQUE INDEX downloads_torrent_hash ON downloads (torrent_hash)
+    ''',
+    # 5: last-change timestamps for retention, and an archive for finished rows
+    '''
+    ALTER TABLE downloads ADD COLUMN updated_at TIMESTAMP;
+    UPDATE downloads SET updated_at = queued_at;
+    
+    DROP TRIGGER downloads_seq_insert;
+    DROP TRIGGER downloads_seq_update;
+    CREATE TRIGGER downloads_seq_insert AFTER INSERT ON downloads BEGIN
+        UPDATE queue_seq SET seq = seq + 1;
+        UPDATE downloads SET updated_seq = (SELECT seq FROM queue_seq), updated_at = CURRENT_TIMESTAMP
+        WHERE id = new.id;
+    END;
+    CREATE TRIGGER downloads_seq_update AFTER UPDATE OF status, local_path ON downloads BEGIN
+        UPDATE queue_seq SET seq = seq + 1;
+        UPDATE downloads SET updated_seq = (SELECT seq FROM queue_seq), updated_at = CURRENT_TIMESTAMP
+        WHERE id = new.id;
+    END;
+    CREATE INDEX downloads_status_updated_at ON downloads (status, updated_at);
+    
+    CREATE TABLE downloads_archive AS SELECT * FROM downloads WHERE 0;
+    ALTER TABLE downloads_archive ADD COLUMN archived_at TIMESTAMP;
+    CREATE INDEX downloads_archive_archived_at ON downloads_archive (archived_at)
+    ''',
+    # 6: scheduling inputs
+    '''
+    ALTER TABLE downloads ADD COLUMN priority INTEGER NOT NULL DEFAULT 0;
+    ALTER TABLE downloads ADD COLUMN category TEXT;
+    ALTER TABLE downloads ADD COLUMN requested_by TEXT;
+    ALTER TABLE downloads ADD COLUMN size_bytes INTEGER;
+    ALTER TABLE downloads_archive ADD COLUMN priority INTEGER;
+    ALTER TABLE downloads_archive ADD COLUMN category TEXT;
+    ALTER TABLE downloads_archive ADD COLUMN requested_by TEXT;
+    ALTER TABLE downloads_archive ADD COLUMN size_bytes INTEGER;
+    CREATE INDEX downloads_status_priority ON downloads (status, priority)
+    ''',
+    # 7: capacity reported by each client
+    '''
+    ALTER TABLE clients ADD COLUMN downloads_path TEXT;
+    ALTER TABLE clients ADD COLUMN available_space INTEGER;
+    ALTER TABLE clients ADD COLUMN max_active INTEGER
+    ''',
+    # 8: change feed reads for the event stream
+    '''
+    CREATE INDEX downloads_updated_seq ON downloads (updated_seq)
+    ''',
+    # 9: priority changes are queue changes too
+    '''
+    DROP TRIGGER downloads_seq_update;
+    CREATE TRIGGER downloads_seq_update AFTER UPDATE OF status, local_path, priority ON downloads BEGIN
+        UPDATE queue_seq SET seq = seq + 1;
+        UPDATE downloads SET updated_seq = (SELECT seq FROM queue_seq), updated_at = CURRENT_TIMESTAMP
+        WHERE id = new.id;
+    END
+    ''',
+    # 10: infohashes for rows queued before 4
+    backfill_torrent_hashes,
+]
+
+FEED_INDEX_MIGRATIONS = [
+    # 1: feed items keyed by infohash with an FTS5 title index
+    '''
+    CREATE TABLE IF NOT EXISTS feed_items (
+        infohash TEXT PRIMARY KEY,
+        title TEXT NOT NULL,
+        magnet TEXT NOT NULL,
+        link TEXT,
+        size_bytes INTEGER,
+        published INTEGER,
+        source TEXT,
+        first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS feed_items_source_published ON feed_items (source, published);
+    CREATE INDEX IF NOT EXISTS feed_items_published ON feed_items (published);
+
+    CREATE VIRTUAL TABLE IF NOT EXISTS feed_items_fts
+        USING fts5(title, content='feed_items', content_rowid='rowid');
+
+    -- Keep the external-content FTS index in step with the table
+    CREATE TRIGGER IF NOT EXISTS feed_items_ai AFTER INSERT ON feed_items BEGIN
+        INSERT INTO feed_items_fts (rowid, title) VALUES (new.rowid, new.title);
+    END;
+    CREATE TRIGGER IF NOT EXISTS feed_items_ad AFTER DELETE ON feed_items BEGIN
+        INSERT INTO feed_items_fts (feed_items_fts, rowid, title) VALUES ('delete', old.rowid, old.title);
+    END;
+    CREATE TRIGGER IF NOT EXISTS feed_items_au AFTER UPDATE OF title ON feed_items BEGIN
+        INSERT INTO feed_items_fts (feed_items_fts, rowid, title) VALUES ('delete', old.rowid, old.title);
+        INSERT INTO feed_items_fts (rowid, title) VALUES (new.rowid, new.title);
+    END;
+    ''',
+]
+
+queue_db = Database(DB_PATH, QUEUE_MIGRATIONS)
+
+class QueueSignal:
+    """Wakes long-polling checkins when work is added to the queue"""
+    
+    def __init__(self):
+        self.generation = 0
+        self._cond = threading.Condition()
+    
+    def notify(self):
+        with self._cond:
+            self.generation += 1
+            self._cond.notify_all()
+    
+    def wait(self, generation, timeout):
+        """Block until notify() has run since `generation` was read, or `timeout` passes"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.generation != generation, timeout)
+
+queue_signal = QueueSignal()
+
+class EventHub:
+    """Fan-out of dashboard change events. Publishers append to one shared,
+    numbered backlog and each stream reads past its own position, so a slow
+    dashboard never holds up a publisher"""
+    
+    def __init__(self, backlog=EVENTS_BACKLOG):
+        self.backlog = deque(maxlen=backlog)
+        self.last_id = 0
+        self.subscribers = 0
+        self.closed = False
+        self._cond = threading.Condition()
+    
+    def publish(self, kind, data):
+        """Queue an event for every open stream; a no-op when nobody listens"""
+        if not self.subscribers:
+            return
+        payload = json.dumps(data)
+        with self._cond:
+            self.last_id += 1
+            self.backlog.append((self.last_id, kind, payload))
+            self._cond.notify_all()
+    
+    def subscribe(self):
+        """Register a stream; returns its starting position, or None when full"""
+        with self._cond:
+            if self.subscribers >= EVENTS_MAX_SUBSCRIBERS:
+                return None
+            self.subscribers += 1
+            return self.last_id
+    
+    def unsubscribe(self):
+        with self._cond:
+            self.subscribers -= 1
+    
+    def wait(self, after_id, timeout):
+        """Events published after `after_id`, waiting up to `timeout` for the first;
+        None once the hub is closed"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.closed or self.last_id > after_id, timeout)
+            if self.closed:
+                return None
+            return [event for event in self.backlog if event[0] > after_id]
+    
+    def close(self):
+        """End every open stream so the server can shut down"""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+events = EventHub()
+
+class DownloadScheduler:
+    """Picks which queued downloads a client gets next: highest priority first,
+    aged so nothing starves, shared fairly across categories and requesters,
+    and within the client's free slots and disk space"""
+    
+    def __init__(self, aging_per_hour=None, fair_share_weight=None):
+        self.aging_per_hour = SCHEDULER_AGING_PER_HOUR if aging_per_hour is None else aging_per_hour
+        self.fair_share_weight = SCHEDULER_FAIR_SHARE_WEIGHT if fair_share_weight is None else fair_share_weight
+    
+    def score(self, row, active):
+        share = active[('category', row['category'])] + active[('user', row['requested_by'])]
+        return (row['priority'] + self.aging_per_hour * row['hours_waited']
+                - self.fair_share_weight * share)
+    
+    def pick(self, candidates, active, slots, space=None):
+        """Choose up to `slots` of `candidates`; `active` counts leased downloads
+        by ('category', name) and ('user', name) and is updated as picks are made"""
+        remaining = list(candidates)
+        chosen = []
+        while remaining and len(chosen) < slots:
+            # Ties go to the oldest row
+            best = max(remaining, key=lambda row: (self.score(row, active), -row['id']))
+            remaining.remove(best)
+            size = best['size_bytes'] or 0
+            if space is not None and (size > space or space <= 0):
+                continue
+            chosen.append(best)
+            active[('category', best['category'])] += 1
+            active[('user', best['requested_by'])] += 1
+            if space is not None:
+                space -= size
+        return chosen
+
+scheduler = DownloadScheduler()
+
+class ClientRegistry(BackgroundService):
+    """Local client heartbeats held in memory and written behind to the
+    clients table in one batch, keeping checkins off the SQLite write path.
+    A client's leases live as long as it keeps sending heartbeats: each flush
+    extends them and returns leases of clients that went quiet to the queue.
+    A client that reports which downloads it is `working` on keeps only those
+    (and claims it has yet to start); the rest run out, as after a crash"""
+    thread_name = 'client-registry'
+    
+    FIELDS = ('client_id', 'last_seen', 'status', 'downloads_path', 'available_space', 'max_active')
+    
+    def __init__(self, db=None, interval=None):
+        self.db = db or queue_db
+        self.interval = CLIENT_FLUSH_INTERVAL if interval is None else interval
+        self.clients = {}
+        # client_id -> ids it reported downloading, or None if it never says
+        self.working = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+        
+        # Start from what the last run knew
+        for row in self.db.connection().execute(f"SELECT {', '.join(self.FIELDS)} FROM clients"):
+            self.clients[row[0]] = dict(zip(self.FIELDS, row))
+    
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Client heartbeat flush error: {e}")
+    
+    def heartbeat(self, client_id, working=None, **info):
+        """Record a checkin; nothing touches the database here"""
+        record = {field: info.get(field) for field in self.FIELDS}
+        record.update(client_id=client_id, last_seen=datetime.now().isoformat(), status='online')
+        with self._lock:
+            self.clients[client_id] = record
+            self.working[client_id] = working
+            self._dirty.add(client_id)
+    
+    @staticmethod
+    def is_online(record):
+        age = (datetime.now() - datetime.fromisoformat(record['last_seen'])).total_seconds()
+        return age < CLIENT_ONLINE_SECONDS
+    
+    def snapshot(self):
+        """Known clients, most recently seen first"""
+        with self._lock:
+            clients = [dict(record) for record in self.clients.values()]
+        return sorted(clients, key=lambda record: record['last_seen'] or '', reverse=True)
+    
+    def flush(self):
+        """Write every client seen since the last flush, extend their leases and
+        requeue expired ones, all in one transaction"""
+        with self._lock:
+            rows = [tuple(self.clients[client_id][field] for field in self.FIELDS) for client_id in self._dirty]
+            working = {client_id: self.working.get(client_id) for client_id in self._dirty}
+            self._dirty.clear()
+        
+        # A lease runs for LEASE_SECONDS from its holder's last heartbeat
+        renew_all, renew_claimed, renew_downloading = [], [], []
+        for row in rows:
+            expires = datetime.fromisoformat(row[1]).timestamp() + LEASE_SECONDS
+            if working[row[0]] is None:
+                renew_all.append((expires, row[0], *LEASED_STATUSES))
+            else:
+                renew_claimed.append((expires, row[0], 'claimed'))
+                renew_downloading.extend((expires, row[0], 'downloading', download_id)
+                                         for download_id in working[row[0]])
+        
+        now = time.time()
+        conn = self.db.connection()
+        expired = conn.execute(
+            'SELECT EXISTS (SELECT 1 FROM downloads WHERE status IN (?, ?) AND lease_expires < ?)',
+            (*LEASED_STATUSES, now)
+        ).fetchone()[0]
+        if not rows and not expired:
+            return 0
+        
+        try:
+            with conn:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO clients ({', '.join(self.FIELDS)}) VALUES ({', '.join('?' * len(self.FIELDS))})",
+                    rows
+                )
+                conn.executemany(
+                    'UPDATE downloads SET lease_expires = ? WHERE claimed_by = ? AND status IN (?, ?)',
+                    renew_all
+                )
+                conn.executemany(
+                    'UPDATE downloads SET lease_expires = ? WHERE claimed_by = ? AND status = ?',
+                    renew_claimed
+                )
+                conn.executemany(
+                    'UPDATE downloads SET lease_expires = ? WHERE claimed_by = ? AND status = ? AND id = ?',
+                    renew_downloading
+                )
+                # Work whose client stopped sending heartbeats goes back to the queue
+                requeued = conn.execute(
+                    'UPDATE downloads SET status = ?, claimed_by = NULL, lease_expires = NULL '
+                    'WHERE status IN (?, ?) AND lease_expires < ?',
+                    ('queued', *LEASED_STATUSES, now)
+                ).rowcount
+        except sqlite3.Error:
+            # Try these again next time unless a newer heartbeat replaced them
+            with self._lock:
+                self._dirty.update(row[0] for row in rows)
+            raise
+        if requeued:
+            queue_signal.notify()
+        return len(rows)
+
+@lazy_singleton
+def get_client_registry():
+    """Return the process-wide client registry, starting its flusher on first use"""
+    return ClientRegistry().start()
+
+class EventPump(BackgroundService):
+    """While any dashboard is listening, turns state that is otherwise only polled
+    (qBittorrent, downloads rows, client heartbeats) into change events"""
+    thread_name = 'event-pump'
+    
+    def __init__(self, hub=None, interval=None):
+        self.hub = hub or events
+        self.interval = EVENTS_POLL_INTERVAL if interval is None else interval
+        self.queue_seq = None
+        self.online = None
+        self._state_lock = threading.Lock()
+    
+    def subscribe(self):
+        """Register a stream with the hub, taking the baselines first so changes
+        made after it connects are never folded into them; None when full"""
+        with self._state_lock:
+            if self.queue_seq is None:
+                self.queue_seq = queue_db.connection().execute('SELECT seq FROM queue_seq').fetchone()[0]
+                self.online = {record['client_id'] for record in get_client_registry().snapshot()
+                               if ClientRegistry.is_online(record)}
+            return self.hub.subscribe()
+    
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            if not self.hub.subscribers:
+                # Start again from the current state when someone connects
+                with self._state_lock:
+                    if not self.hub.subscribers:
+                        self.queue_seq = self.online = None
+                continue
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"Event pump error: {e}")
+    
+    def tick(self):
+        # The mirror publishes its own deltas
+        get_qbt_client().mirror.sync()
+        self.poll_queue()
+        self.poll_clients()
+    
+    def poll_queue(self):
+        """Publish downloads rows whose state changed since the last tick"""
+        conn = queue_db.connection()
+        cursor = conn.execute(
+            'SELECT * FROM downloads WHERE updated_seq > ? ORDER BY updated_seq LIMIT 200', (self.queue_seq,)
+        )
+        columns = [description[0] for description in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        if rows:
+            self.queue_seq = rows[-1]['updated_seq']
+            self.hub.publish('queue', rows)
+    
+    def poll_clients(self):
+        """Publish local clients coming online or going quiet"""
+        records = get_client_registry().snapshot()
+        online = {record['client_id'] for record in records if ClientRegistry.is_online(record)}
+        if self.online is not None:
+            for client_id in online - self.online:
+                self.hub.publish('client', {'client_id': client_id, 'online': True})
+            for client_id in self.online - online:
+                self.hub.publish('client', {'client_id': client_id, 'online': False})
+        self.online = online
+
+@lazy_singleton
+def get_event_pump():
+    """Return the process-wide event pump, starting it on first use"""
+    return EventPump().start()
+
+class QueueJanitor(BackgroundService):
+    """Moves long-finished downloads out of the live queue and hands freed
+    pages back to the filesystem, so queue reads stay fast as history grows"""
+    thread_name = 'queue-janitor'
+    
+    def __init__(self, db=None, interval=None):
+        self.db = db or queue_db
+        self.interval = QUEUE_MAINTENANCE_INTERVAL if interval is None else interval
+    
+    def _run(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Queue maintenance error: {e}")
+            time.sleep(self.interval)
+    
+    def run_once(self):
+        """Archive or delete expired rows, then release some free pages"""
+        conn = self.db.connection()
+        
+        # Turning on incremental mode for an existing file takes one full VACUUM
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.execute('VACUUM')
+        
+        removed = 0
+        if QUEUE_RETENTION_DAYS > 0:
+            expired = "status IN ('completed', 'failed') AND updated_at < ?"
+            with conn:
+                # One cutoff for both statements, so a row can't be deleted unarchived
+                # because the clock passed a second boundary in between
+                cutoff = conn.execute("SELECT datetime('now', ?)", (f'-{QUEUE_RETENTION_DAYS} days',)).fetchone()[0]
+                if QUEUE_ARCHIVE:
+                    # Copy the columns the archive knows about; it is created from downloads
+                    columns = ', '.join(row[1] for row in conn.execute('PRAGMA table_info(downloads_archive)')
+                                        if row[1] != 'archived_at')
+                    conn.execute(
+                        f'INSERT INTO downloads_archive ({columns}, archived_at) '
+                        f'SELECT {columns}, CURRENT_TIMESTAMP FROM downloads WHERE {expired}',
+                        (cutoff,)
+                    )
+                removed = conn.execute(f'DELETE FROM downloads WHERE {expired}', (cutoff,)).rowcount
+        
+        conn.execute(f'PRAGMA incremental_vacuum({QUEUE_VACUUM_PAGES})').fetchall()
+        if removed:
+            print(f"🧹 {'Archived' if QUEUE_ARCHIVE else 'Deleted'} {removed} finished downloads")
+        return removed
+
+@lazy_singleton
+def get_queue_janitor():
+    """Return the process-wide queue janitor, starting it on first use"""
+    return QueueJanitor().start()
+
+def collect_queue_depth():
+    """Downloads per status, read from the queue when /metrics is scraped"""
+    depth = {(status,): 0 for status in ('queued',) + LEASED_STATUSES}
+    for status, count in queue_db.connection().execute('SELECT status, COUNT(*) FROM downloads GROUP BY status'):
+        depth[(status,)] = count
+    return depth
+
+def collect_connected_clients():
+    online = [record for record in get_client_registry().snapshot() if ClientRegistry.is_online(record)]
+    return {(): len(online)}
+
+metrics.gauge('beytv_queue_downloads', 'Downloads in the queue by status', ('status',), collect=collect_queue_depth)
+metrics.gauge('beytv_clients_connected', 'Local clients that checked in recently', collect=collect_connected_clients)
+
+class BeyTVServer(KeepAliveHandler, BaseHTTPRequestHandler):
     
     def __init__(self, *args, **kwargs):
-        # Initialize qBittorrent connection and RSS manager
-        self.qbt = QBittorrentAPI()
-        self.rss = RSSManager()
+        # Borrow the shared qBittorrent connection
+        self.qbt = get_qbt_client()
         super().__init__(*args, **kwargs)
     
+    def handle_one_request(self):
+        """Handle the next request on the connection, recording its latency by route and status"""
+        self.request_started = None
+        self.response_status = None
+        try:
+            super().handle_one_request()
+        finally:
+            if self.request_started is not None and self.command:
+                REQUEST_LATENCY.observe(time.perf_counter() - self.request_started,
+                                        self.route_label(), self.command, str(self.response_status or 500))
+    
+    def parse_request(self):
+        # Started once the request line is in, so idle keep-alive time is not counted
+        self.request_started = time.perf_counter()
+        return super().parse_request()
+    
+    def send_response(self, code, message=None):
+        self.response_status = code
+        super().send_response(code, message)
+    
+    def route_label(self):
+        path = urlparse(self.path).path
+        if path in METRIC_ROUTES:
+            return path
+        if path.startswith('/api/feeds/'):
+            return '/api/feeds/:feed'
+        return 'other'
+    
+    @property
+    def feeds(self):
+        """The shared background feed refresher"""
+        return get_feed_refresher()
+    
     def do_GET(self):
+        policy = RESPONSE_CACHE_ROUTES.get(self.path)
+        if policy:
+            self.send_cached(response_cache.get(self.path, *policy, copy.copy(self).render_response))
+        else:
+            self.route_get()
+    
+    def render_response(self):
+        """Run the GET route into a buffer instead of the socket, as a CachedResponse.
+        Called on a copy of the handler, possibly after the request has been answered"""
+        self.wfile = io.BytesIO()
+        self._headers_buffer = []
+        self.log_request = lambda *args: None
+        # Render uncompressed; each request gets the encoding it asked for on replay
+        self.compress_responses = False
+        self.route_get()
+        
+        head, _, body = self.wfile.getvalue().partition(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        headers = [tuple(line.split(': ', 1)) for line in lines[1:] if line]
+        return CachedResponse(
+            status=int(lines[0].split()[1]),
+            headers=[(name, value) for name, value in headers if name not in RESPONSE_CACHE_SKIP_HEADERS],
+            body=body,
+            gzipped=gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_BYTES else None,
+            stored_at=time.time()
+        )
+    
+    def send_cached(self, response):
+        self.send_response(response.status)
+        for name, value in response.headers:
+            self.send_header(name, value)
+        self.send_header('Age', str(int(time.time() - response.stored_at)))
+        self.send_encoded(response.body, response.gzipped)
+    
+    def route_get(self):
         if self.path == '/':
             self.serve_dashboard()
         elif self.path == '/api/feeds':
             self.get_rss_feeds()
         elif self.path == '/api/feeds/refresh':
             self.refresh_feeds()
+        elif self.path.startswith('/api/feeds/history'):
+            self.get_feed_history()
         elif self.path.startswith('/api/feeds/'):
             self.get_specific_feed()
+        elif self.path == '/api/events':
+            self.stream_events()
+        elif self.path == '/metrics':
+            self.get_metrics()
         elif self.path == '/api/local-status':
             self.get_local_status()
         elif self.path == '/api/qbt-status':
             self.get_qbt_status()
         elif self.path == '/api/qbt-torrents':
             self.get_qbt_torrents()
-        elif self.path == '/api/queue':
+        elif self.path == '/api/queue' or self.path.startswith('/api/queue?'):
             self.get_download_queue()
+        elif self.path.startswith('/api/search/results'):
+            self.get_search_results()
+        elif self.path == '/api/search/stats':
+            self.get_search_stats()
         elif self.path.startswith('/api/search'):
             self.search_torrents()
         else:
@@ -260,421 +1659,34 @@ class BeyTVServer(BaseHTTPRequestHandler):
     def do_POST(self):
         if self.path == '/api/queue-download':
             self.queue_download()
+        elif self.path == '/api/queue-download/batch':
+            self.queue_download_batch()
+        elif self.path == '/api/queue/priority':
+            self.set_download_priority()
         elif self.path == '/api/add-torrent':
             self.add_torrent_to_qbt()
+        elif self.path == '/api/search/stop':
+            self.stop_search()
         elif self.path == '/api/client/checkin':
             self.client_checkin()
+        elif self.path == '/api/client/heartbeat':
+            self.client_heartbeat()
         elif self.path == '/api/client/update-status':
             self.update_download_status()
+        elif self.path == '/api/client/update-status/batch':
+            self.update_download_status_batch()
         else:
             self.send_error(404)
     
     def serve_dashboard(self):
-        html = """<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>BeyTV Remote Control - RSS + qBittorrent + Plex</title>
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            color: white;
-        }
-        .container { max-width: 1400px; margin: 0 auto; padding: 2rem; }
-        .header { text-align: center; margin-bottom: 2rem; }
-        .header h1 { font-size: 3rem; margin-bottom: 0.5rem; text-shadow: 2px 2px 4px rgba(0,0,0,0.3); }
-        .controls { display: grid; grid-template-columns: repeat(auto-fit, minmax(300px, 1fr)); gap: 1rem; margin-bottom: 2rem; }
-        .card { background: rgba(255,255,255,0.1); backdrop-filter: blur(15px); border-radius: 15px; padding: 1.5rem; border: 1px solid rgba(255,255,255,0.2); }
-        .card h3 { margin-bottom: 1rem; font-size: 1.2rem; }
-        .btn { background: rgba(255,255,255,0.2); border: 1px solid rgba(255,255,255,0.3); color: white; padding: 0.5rem 1rem; border-radius: 8px; cursor: pointer; margin: 0.25rem; text-decoration: none; display: inline-block; }
-        .btn:hover { background: rgba(255,255,255,0.3); }
-        .btn.download { background: rgba(76, 175, 80, 0.6); }
-        .btn.download:hover { background: rgba(76, 175, 80, 0.8); }
-        .btn.torrent { background: rgba(33, 150, 243, 0.6); }
-        .btn.torrent:hover { background: rgba(33, 150, 243, 0.8); }
-        .btn.rss { background: rgba(255, 152, 0, 0.6); }
-        .btn.rss:hover { background: rgba(255, 152, 0, 0.8); }
-        .status { position: fixed; top: 1rem; right: 1rem; background: rgba(0,0,0,0.8); padding: 0.5rem 1rem; border-radius: 20px; font-size: 0.9rem; }
-        .local-status, .qbt-status { background: rgba(255,255,255,0.05); padding: 1rem; border-radius: 8px; margin: 1rem 0; }
-        .queue-item, .torrent-item, .rss-item { background: rgba(255,255,255,0.05); padding: 1rem; margin: 0.5rem 0; border-radius: 8px; border-left: 3px solid #4CAF50; }
-        .rss-item { border-left-color: #ff9800; }
-        .search-box { width: 100%; padding: 0.75rem; border: 1px solid rgba(255,255,255,0.3); border-radius: 8px; background: rgba(255,255,255,0.1); color: white; margin-bottom: 1rem; }
-        .loading { text-align: center; padding: 2rem; }
-        .tabs { display: flex; margin-bottom: 1rem; flex-wrap: wrap; }
-        .tab { padding: 0.5rem 1rem; margin-right: 0.5rem; margin-bottom: 0.5rem; border-radius: 8px 8px 0 0; cursor: pointer; background: rgba(255,255,255,0.1); }
-        .tab.active { background: rgba(255,255,255,0.2); }
-        .tab-content { display: none; }
-        .tab-content.active { display: block; }
-        .feed-selector { display: flex; flex-wrap: wrap; gap: 0.5rem; margin-bottom: 1rem; }
-    </style>
-</head>
-<body>
-    <div class="status" id="status">🔄 Checking connections...</div>
-    
-    <div class="container">
-        <div class="header">
-            <h1>🎬 BeyTV Remote Control</h1>
-            <p>RSS Feeds → qBittorrent + Plugins → Plex Library</p>
-        </div>
-        
-        <div class="controls">
-            <div class="card">
-                <h3>� RSS Feeds</h3>
-                <div class="feed-selector">
-                    <button class="btn rss" onclick="loadFeed('all')">All Feeds</button>
-                    <button class="btn rss" onclick="loadFeed('movies_1080p')">Movies 1080p</button>
-                    <button class="btn rss" onclick="loadFeed('movies_4k')">Movies 4K</button>
-                    <button class="btn rss" onclick="loadFeed('tv_shows')">TV Shows</button>
-                    <button class="btn rss" onclick="loadFeed('popular')">Popular</button>
-                </div>
-                <button class="btn" onclick="refreshAllFeeds()">Refresh All Feeds</button>
-            </div>
-            
-            <div class="card">
-                <h3>🌊 qBittorrent Status</h3>
-                <div id="qbtStatus" class="qbt-status">
-                    <div class="loading">Checking qBittorrent...</div>
-                </div>
-                <button class="btn" onclick="refreshQBT()">Refresh</button>
-            </div>
-            
-            <div class="card">
-                <h3>🔍 Manual Search</h3>
-                <input type="text" class="search-box" id="searchBox" placeholder="Search qBittorrent plugins..." onkeypress="handleSearch(event)">
-                <button class="btn" onclick="searchTorrents()">Search Plugins</button>
-            </div>
-        </div>
-        
-        <div class="card">
-            <div class="tabs">
-                <div class="tab active" onclick="showTab('rss')">📡 RSS Feeds</div>
-                <div class="tab" onclick="showTab('search')">🔍 Search Results</div>
-                <div class="tab" onclick="showTab('active')">🌊 Active Torrents</div>
-                <div class="tab" onclick="showTab('queue')">📥 Download Queue</div>
-            </div>
-            
-            <div id="rssTab" class="tab-content active">
-                <h2>� Latest from RSS Feeds</h2>
-                <div id="rssContent" class="loading">Loading RSS feeds...</div>
-            </div>
-            
-            <div id="searchTab" class="tab-content">
-                <h2>🔍 Search Results</h2>
-                <div id="searchContent" class="loading">Use search above to find torrents...</div>
-            </div>
-            
-            <div id="activeTab" class="tab-content">
-                <h2>🌊 Active qBittorrent Torrents</h2>
-                <div id="activeContent" class="loading">Loading active torrents...</div>
-            </div>
-            
-            <div id="queueTab" class="tab-content">
-                <h2>📥 Download Queue for Plex</h2>
-                <div id="queueContent" class="loading">Loading queue...</div>
-            </div>
-        </div>
-    </div>
-
-    <script>
-        let currentTab = 'rss';
-        
-        function showTab(tab) {
-            // Hide all tabs
-            document.querySelectorAll('.tab-content').forEach(t => t.classList.remove('active'));
-            document.querySelectorAll('.tab').forEach(t => t.classList.remove('active'));
-            
-            // Show selected tab
-            document.getElementById(tab + 'Tab').classList.add('active');
-            event.target.classList.add('active');
-            
-            currentTab = tab;
-            
-            // Load content for active tabs
-            if (tab === 'rss') loadFeed('all');
-            if (tab === 'active') refreshQBTTorrents();
-            if (tab === 'queue') refreshQueue();
-        }
-        
-        async function loadFeed(feedName) {
-            document.getElementById('rssContent').innerHTML = '<div class="loading">Loading RSS feed...</div>';
-            showTab('rss');
-            
-            try {
-                const url = feedName === 'all' ? '/api/feeds' : `/api/feeds/${feedName}`;
-                const response = await fetch(url);
-                const items = await response.json();
-                displayRSSItems(items);
-            } catch (error) {
-                document.getElementById('rssContent').innerHTML = '<div class="loading">❌ Failed to load RSS feeds</div>';
-            }
-        }
-        
-        function displayRSSItems(items) {
-            const container = document.getElementById('rssContent');
-            
-            if (!items || items.length === 0) {
-                container.innerHTML = '<div class="loading">No items in RSS feeds</div>';
-                return;
-            }
-            
-            container.innerHTML = items.map(item => `
-                <div class="rss-item">
-                    <div style="font-weight: bold;">${item.title}</div>
-                    <div style="font-size: 0.9rem; opacity: 0.8; margin: 0.5rem 0;">
-                        Size: ${item.size} | 
-                        Source: ${item.source} | 
-                        Published: ${new Date(item.published).toLocaleDateString()}
-                    </div>
-                    <div style="font-size: 0.85rem; opacity: 0.7; margin: 0.5rem 0;">
-                        ${item.description.substring(0, 150)}...
-                    </div>
-                    <div>
-                        <button class="btn torrent" onclick="addToQBT('${item.magnet}', '${item.title.replace(/'/g, "\\'")}')">Add to qBittorrent</button>
-                        <button class="btn download" onclick="queueForPlex('${item.magnet}', '${item.title.replace(/'/g, "\\'")}')">Queue for Plex</button>
-                        <button class="btn" onclick="viewDetails('${item.link}')">View Details</button>
-                    </div>
-                </div>
-            `).join('');
-        }
-        
-        async function refreshAllFeeds() {
-            document.getElementById('rssContent').innerHTML = '<div class="loading">Refreshing all RSS feeds...</div>';
-            try {
-                const response = await fetch('/api/feeds/refresh');
-                const data = await response.json();
-                displayRSSItems(data.items);
-                alert(`✅ Refreshed ${data.items.length} items from RSS feeds`);
-            } catch (error) {
-                document.getElementById('rssContent').innerHTML = '<div class="loading">❌ Failed to refresh feeds</div>';
-            }
-        }
-        
-        async function refreshQBT() {
-            try {
-                const response = await fetch('/api/qbt-status');
-                const status = await response.json();
-                displayQBTStatus(status);
-            } catch (error) {
-                displayQBTStatus({connected: false, error: error.message});
-            }
-        }
-        
-        function displayQBTStatus(status) {
-            const container = document.getElementById('qbtStatus');
-            const statusIndicator = document.getElementById('status');
-            
-            if (status.connected) {
-                container.innerHTML = `
-                    <div style="color: #4CAF50;">🟢 qBittorrent Connected</div>
-                    <div>Active: ${status.active_torrents || 0} torrents</div>
-                    <div>Download: ${Math.round((status.download_speed || 0) / 1024)}KB/s</div>
-                    <div>Upload: ${Math.round((status.upload_speed || 0) / 1024)}KB/s</div>
-                `;
-                statusIndicator.textContent = '🟢 RSS + qBittorrent Ready';
-            } else {
-                container.innerHTML = `
-                    <div style="color: #f44336;">🔴 qBittorrent Offline</div>
-                    <div>Start qBittorrent with Web UI enabled</div>
-                    <div>Default: http://localhost:8080</div>
-                `;
-                statusIndicator.textContent = '🔴 qBittorrent Needed';
-            }
-        }
-        
-        function handleSearch(event) {
-            if (event.key === 'Enter') {
-                searchTorrents();
-            }
-        }
-        
-        async function searchTorrents() {
-            const query = document.getElementById('searchBox').value.trim();
-            if (!query) {
-                alert('Please enter a search term');
-                return;
-            }
-            
-            document.getElementById('searchContent').innerHTML = '<div class="loading">Searching qBittorrent plugins...</div>';
-            showTab('search');
-            
-            try {
-                const response = await fetch(`/api/search?q=${encodeURIComponent(query)}`);
-                const results = await response.json();
-                displaySearchResults(results);
-            } catch (error) {
-                document.getElementById('searchContent').innerHTML = '<div class="loading">❌ Search failed</div>';
-            }
-        }
-        
-        function displaySearchResults(results) {
-            const container = document.getElementById('searchContent');
-            
-            if (!results || results.length === 0) {
-                container.innerHTML = '<div class="loading">No torrents found</div>';
-                return;
-            }
-            
-            container.innerHTML = results.map(item => `
-                <div class="torrent-item">
-                    <div style="font-weight: bold;">${item.fileName || item.title}</div>
-                    <div style="font-size: 0.9rem; opacity: 0.8; margin: 0.5rem 0;">
-                        Size: ${item.fileSize || item.size} | 
-                        Seeds: ${item.nbSeeders || 0} | 
-                        Peers: ${item.nbLeechers || 0} | 
-                        Site: ${item.siteUrl || item.source}
-                    </div>
-                    <div>
-                        <button class="btn torrent" onclick="addToQBT('${item.descrLink || item.url}', '${(item.fileName || item.title).replace(/'/g, "\\'")}')">Add to qBittorrent</button>
-                        <button class="btn download" onclick="queueForPlex('${item.descrLink || item.url}', '${(item.fileName || item.title).replace(/'/g, "\\'")}')">Queue for Plex</button>
-                    </div>
-                </div>
-            `).join('');
-        }
-        
-        async function addToQBT(magnetUrl, title) {
-            try {
-                const response = await fetch('/api/add-torrent', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({url: magnetUrl, title: title})
-                });
-                
-                const result = await response.json();
-                if (response.ok) {
-                    alert(`✅ "${title}" added to qBittorrent!`);
-                    if (currentTab === 'active') refreshQBTTorrents();
-                } else {
-                    alert(`❌ Failed: ${result.message}`);
-                }
-            } catch (error) {
-                alert(`❌ Error: ${error.message}`);
-            }
-        }
-        
-        async function queueForPlex(magnetUrl, title) {
-            try {
-                const response = await fetch('/api/queue-download', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({id: Date.now(), title: title, url: magnetUrl})
-                });
-                
-                const result = await response.json();
-                if (response.ok) {
-                    alert(`✅ "${title}" queued for Plex!`);
-                    if (currentTab === 'queue') refreshQueue();
-                } else {
-                    alert(`❌ Failed: ${result.message}`);
-                }
-            } catch (error) {
-                alert(`❌ Error: ${error.message}`);
-            }
-        }
-        
-        function viewDetails(url) {
-            window.open(url, '_blank');
-        }
-        
-        async function refreshQBTTorrents() {
-            document.getElementById('activeContent').innerHTML = '<div class="loading">Loading active torrents...</div>';
-            try {
-                const response = await fetch('/api/qbt-torrents');
-                const torrents = await response.json();
-                displayActiveTorrents(torrents);
-            } catch (error) {
-                document.getElementById('activeContent').innerHTML = '<div class="loading">❌ Error loading torrents</div>';
-            }
-        }
-        
-        function displayActiveTorrents(torrents) {
-            const container = document.getElementById('activeContent');
-            
-            if (!torrents || torrents.length === 0) {
-                container.innerHTML = '<div class="loading">No active torrents</div>';
-                return;
-            }
-            
-            container.innerHTML = torrents.map(torrent => `
-                <div class="torrent-item ${torrent.state}">
-                    <div style="font-weight: bold;">${torrent.name}</div>
-                    <div style="font-size: 0.9rem; opacity: 0.8;">
-                        Progress: ${Math.round(torrent.progress * 100)}% | 
-                        Size: ${Math.round(torrent.size / 1024 / 1024)}MB | 
-                        Status: ${torrent.state.toUpperCase()} |
-                        DL: ${Math.round(torrent.dlspeed / 1024)}KB/s |
-                        UL: ${Math.round(torrent.upspeed / 1024)}KB/s
-                    </div>
-                </div>
-            `).join('');
-        }
-        
-        async function refreshQueue() {
-            document.getElementById('queueContent').innerHTML = '<div class="loading">Loading queue...</div>';
-            try {
-                const response = await fetch('/api/queue');
-                const queue = await response.json();
-                displayQueue(queue);
-            } catch (error) {
-                document.getElementById('queueContent').innerHTML = '<div class="loading">❌ Error loading queue</div>';
-            }
-        }
-        
-        function displayQueue(queue) {
-            const container = document.getElementById('queueContent');
-            
-            if (!queue || queue.length === 0) {
-                container.innerHTML = '<div class="loading">No downloads queued</div>';
-                return;
-            }
-            
-            container.innerHTML = queue.map(item => `
-                <div class="queue-item ${item.status}">
-                    <div style="font-weight: bold;">${item.title}</div>
-                    <div style="font-size: 0.9rem; opacity: 0.8;">
-                        Status: ${item.status.toUpperCase()} | 
-                        Queued: ${new Date(item.queued_at).toLocaleString()}
-                        ${item.local_path ? '| Path: ' + item.local_path : ''}
-                    </div>
-                </div>
-            `).join('');
-        }
-        
-        // Auto-refresh every 30 seconds
-        setInterval(() => {
-            refreshQBT();
-            if (currentTab === 'rss') loadFeed('all');
-            if (currentTab === 'active') refreshQBTTorrents();
-            if (currentTab === 'queue') refreshQueue();
-        }, 30000);
-        
-        // Initial load
-        window.addEventListener('load', () => {
-            setTimeout(() => {
-                refreshQBT();
-                loadFeed('all');
-            }, 1000);
-        });
-    </script>
-</body>
-</html>"""
-        self.send_response(200)
-        self.send_header('Content-type', 'text/html')
-        self.end_headers()
-        self.wfile.write(html.encode())
+        DASHBOARD.serve(self)
     
     def get_rss_feeds(self):
         """Get combined RSS feed items"""
         try:
-            items = self.rss.get_all_feeds(limit_per_feed=8)
+            body = self.feeds.snapshot.all_json
             
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps(items).encode())
+            self.send_json(body)
             
         except Exception as e:
             self.send_error(500, str(e))
@@ -684,33 +1696,42 @@ class BeyTVServer(BaseHTTPRequestHandler):
         try:
             # Extract feed name from path: /api/feeds/movies_1080p
             feed_name = self.path.split('/')[-1]
-            items = self.rss.get_feed_items(feed_name, limit=20)
+            body = self.feeds.snapshot.feed_json.get(feed_name, b'[]')
             
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps(items).encode())
+            self.send_json(body)
+            
+        except Exception as e:
+            self.send_error(500, str(e))
+    
+    def get_feed_history(self):
+        """Get older feed items from the local index"""
+        try:
+            query_params = parse_qs(urlparse(self.path).query)
+            source = query_params.get('source', [None])[0]
+            before = query_params.get('before', [None])[0]
+            limit = min(int(query_params.get('limit', ['50'])[0]), 500)
+            
+            items = self.feeds.index.history(source, int(before) if before else None, limit)
             
+            self.send_json(items)
+            
+        except ValueError:
+            self.send_error(400, "Invalid before or limit")
         except Exception as e:
             self.send_error(500, str(e))
     
     def refresh_feeds(self):
-        """Force refresh all RSS feeds"""
+        """Schedule a refresh of all RSS feeds"""
         try:
-            # Clear any cached data and fetch fresh
-            self.rss = RSSManager()
-            items = self.rss.get_all_feeds(limit_per_feed=10)
+            self.feeds.trigger()
             
             response = {
-                "status": "success", 
-                "message": f"Refreshed {len(items)} items from RSS feeds",
-                "items": items
+                "status": "success",
+                "message": "RSS feed refresh scheduled",
+                "refreshed_at": self.feeds.snapshot.refreshed_at
             }
             
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps(response).encode())
+            self.send_json(response)
             
         except Exception as e:
             self.send_error(500, str(e))
@@ -719,10 +1740,7 @@ class BeyTVServer(BaseHTTPRequestHandler):
         """Get qBittorrent status"""
         try:
             status = self.qbt.get_status()
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps(status).encode())
+            self.send_json(status)
         except Exception as e:
             self.send_error(500, str(e))
     
@@ -730,38 +1748,44 @@ class BeyTVServer(BaseHTTPRequestHandler):
         """Get active torrents from qBittorrent"""
         try:
             torrents = self.qbt.get_torrents()
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps(torrents).encode())
+            self.send_json(torrents)
         except Exception as e:
             self.send_error(500, str(e))
     
     def add_torrent_to_qbt(self):
         """Add torrent to qBittorrent"""
         try:
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode('utf-8'))
+            data = self.read_json()
+            
+            if not isinstance(data.get('url'), str) or not data['url']:
+                self.send_error(400, "Missing torrent url")
+                return
+            
+            infohash = parse_infohash(data['url'])
+            if infohash and self.qbt.has_torrent(infohash):
+                response = {"status": "duplicate", "message": "Torrent is already in qBittorrent"}
+                self.send_json(response, 409)
+                return
             
             success = self.qbt.add_torrent(data['url'])
             
             if success:
+                # The dashboard reloads the list next; make it include the new torrent
+                self.qbt.mirror.sync(force=True)
+                response_cache.invalidate('/api/qbt-torrents', '/api/qbt-status')
                 response = {"status": "success", "message": "Torrent added to qBittorrent"}
-                self.send_response(200)
+                self.send_json(response)
             else:
                 response = {"status": "error", "message": "Failed to add torrent"}
-                self.send_response(400)
-            
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps(response).encode())
+                self.send_json(response, 400)
             
+        except RequestBodyError as e:
+            self.send_error(e.status, str(e))
         except Exception as e:
             self.send_error(500, str(e))
     
     def search_torrents(self):
-        """Search torrents using qBittorrent plugins"""
+        """Start a background search using qBittorrent plugins"""
         try:
             query_components = urlparse(self.path)
             query_params = parse_qs(query_components.query)
@@ -771,52 +1795,219 @@ class BeyTVServer(BaseHTTPRequestHandler):
                 self.send_error(400, "Missing query parameter")
                 return
             
-            # Use real qBittorrent search
-            results = self.qbt.search(search_query)
+            plugins = query_params.get('plugins', ['all'])[0]
+            category = query_params.get('category', ['all'])[0]
             
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps(results).encode())
+            # Matches from the local feed index are instant, plugins answer later
+            local = self.search_local(search_query)
+            
+            # Return the job straight away, results are polled from /api/search/results
+            try:
+                job = self.qbt.start_search(search_query, plugins, category)
+                response = job.page()
+                response['local'] = local
+                self.send_json(response)
+            except Exception as e:
+                response = {"status": "error", "message": f"Search failed to start: {e}", "local": local}
+                self.send_json(response, 200 if local else 503)
             
         except Exception as e:
             print(f"Search error: {e}")
             self.send_error(500, str(e))
     
+    def search_local(self, search_query):
+        """Search the local feed index"""
+        try:
+            return self.feeds.index.search(search_query)
+        except sqlite3.Error as e:
+            print(f"Feed index search error: {e}")
+            return []
+    
+    def get_search_results(self):
+        """Get search results from an offset onwards"""
+        try:
+            query_params = parse_qs(urlparse(self.path).query)
+            job = self.qbt.get_search(int(query_params.get('id', ['0'])[0]))
+            if not job:
+                self.send_error(404, "Unknown search id")
+                return
+            
+            offset = int(query_params.get('offset', ['0'])[0])
+            
+            self.send_json(job.page(offset))
+            
+        except ValueError:
+            self.send_error(400, "Invalid id or offset")
+        except Exception as e:
+            self.send_error(500, str(e))
+    
+    def get_search_stats(self):
+        """Get search cache hit/miss counters"""
+        try:
+            stats = self.qbt.search_cache.stats()
+            self.send_json(stats)
+        except Exception as e:
+            self.send_error(500, str(e))
+    
+    def stop_search(self):
+        """Stop a running search"""
+        try:
+            data = self.read_json()
+            
+            job = self.qbt.get_search(data.get('id'))
+            if not job:
+                self.send_error(404, "Unknown search id")
+                return
+            job.stop()
+            
+            response = {"status": "success"}
+            self.send_json(response)
+            
+        except RequestBodyError as e:
+            self.send_error(e.status, str(e))
+        except Exception as e:
+            self.send_error(500, str(e))
+    
     def queue_download(self):
         """Add download to queue for local client to pick up"""
         try:
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode('utf-8'))
+            data = self.read_json()
             
-            # Initialize database
-            self.init_database()
+            if self.insert_downloads([data], self.requester()):
+                response = {"status": "success", "message": "Download queued"}
+                self.send_json(response)
+            else:
+                response = {"status": "duplicate", "message": "Already in the download queue"}
+                self.send_json(response, 409)
             
-            conn = sqlite3.connect('download_queue.db')
-            conn.execute(
-                'INSERT INTO downloads (title, url, status, torrent_hash) VALUES (?, ?, ?, ?)',
-                (data['title'], data['url'], 'queued', '')
-            )
-            conn.commit()
-            conn.close()
+        except RequestBodyError as e:
+            self.send_error(e.status, str(e))
+        except ValueError as e:
+            self.send_error(400, str(e))
+        except Exception as e:
+            self.send_error(500, str(e))
+    
+    def queue_download_batch(self):
+        """Add a list of downloads, e.g. a whole season, in one request and one commit"""
+        try:
+            data = self.read_json(types=(dict, list))
+            items = data.get('downloads', []) if isinstance(data, dict) else data
             
-            response = {"status": "success", "message": "Download queued"}
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps(response).encode())
+            queued = self.insert_downloads(items, self.requester())
             
+            response = {"status": "success", "queued": queued, "duplicates": len(items) - queued}
+            self.send_json(response)
+            
+        except RequestBodyError as e:
+            self.send_error(e.status, str(e))
+        except ValueError as e:
+            self.send_error(400, str(e))
         except Exception as e:
             self.send_error(500, str(e))
     
-    def get_download_queue(self):
-        """Get current download queue"""
+    def set_download_priority(self):
+        """Change the priority of a download that is still waiting to be claimed"""
         try:
-            self.init_database()
+            data = self.read_json()
+            priority = int(data['priority'])
+            download_id = int(data['id'])
+        except RequestBodyError as e:
+            self.send_error(e.status, str(e))
+            return
+        except (KeyError, TypeError, ValueError):
+            self.send_error(400, "Invalid id or priority")
+            return
+        
+        try:
+            # Claimed rows are left alone: a new updated_seq would send them to their client again
+            conn = queue_db.connection()
+            with conn:
+                cursor = conn.execute(
+                    'UPDATE downloads SET priority = ? WHERE id = ? AND status = ?',
+                    (priority, download_id, 'queued')
+                )
+            
+            if cursor.rowcount == 0:
+                self.send_error(404, "No queued download with that id")
+                return
             
-            conn = sqlite3.connect('download_queue.db')
-            cursor = conn.execute('SELECT * FROM downloads ORDER BY queued_at DESC')
+            response = {"status": "success"}
+            self.send_json(response)
+            
+        except Exception as e:
+            self.send_error(500, str(e))
+    
+    def requester(self):
+        """Who a download is for when the request does not say: the address the Replit
+        proxy saw, which it appends last to X-Forwarded-For, else the socket peer"""
+        forwarded = self.headers.get('X-Forwarded-For')
+        if forwarded:
+            return forwarded.split(',')[-1].strip()
+        return self.client_address[0]
+    
+    def insert_downloads(self, items, requested_by=None):
+        """Queue downloads in a single transaction and wake waiting clients.
+        A torrent already in the queue is skipped unless it failed, in which
+        case it is queued again; returns how many rows were queued.
+        Raises ValueError, before writing anything, if any item is malformed"""
+        if not isinstance(items, list):
+            raise ValueError("Downloads must be a list")
+        rows = []
+        for item in items:
+            if not isinstance(item, dict) or not all(isinstance(item.get(key), str) and item[key]
+                                                     for key in ('title', 'url')):
+                raise ValueError("Every download needs a title and a url")
+            try:
+                priority = int(item.get('priority') or 0)
+                size_bytes = item.get('size_bytes') and int(item['size_bytes'])
+            except (TypeError, ValueError):
+                raise ValueError("Download priority and size_bytes must be integers")
+            release = parse_release(item['title'])
+            rows.append((
+                item['title'], item['url'], 'queued', parse_infohash(item['url']),
+                priority, release.content_type,
+                item.get('requested_by') or requested_by,
+                size_bytes or release.size_bytes
+            ))
+        if not rows:
+            return 0
+        
+        conn = queue_db.connection()
+        with conn:
+            cursor = conn.executemany(
+                'INSERT INTO downloads (title, url, status, torrent_hash, priority, category, requested_by, size_bytes) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (torrent_hash) DO UPDATE SET '
+                'title = excluded.title, url = excluded.url, status = excluded.status, '
+                'priority = excluded.priority, requested_by = excluded.requested_by, '
+                "local_path = '', claimed_by = NULL, lease_expires = NULL "
+                "WHERE downloads.status = 'failed'",
+                rows
+            )
+        if cursor.rowcount:
+            queue_signal.notify()
+        return cursor.rowcount
+    
+    def get_download_queue(self):
+        """Get one page of the download queue, newest first"""
+        try:
+            query_params = parse_qs(urlparse(self.path).query)
+            status = query_params.get('status', [None])[0]
+            before = query_params.get('cursor', [None])[0]
+            limit = max(1, min(int(query_params.get('limit', [QUEUE_PAGE_SIZE])[0]), QUEUE_MAX_PAGE_SIZE))
+            
+            conditions, params = [], []
+            if status:
+                conditions.append('status = ?')
+                params.append(status)
+            if before:
+                conditions.append('id < ?')
+                params.append(int(before))
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+            
+            cursor = queue_db.connection().execute(
+                f'SELECT * FROM downloads {where} ORDER BY id DESC LIMIT ?', (*params, limit + 1)
+            )
             
             columns = [description[0] for description in cursor.description]
             queue = []
@@ -825,124 +2016,357 @@ class BeyTVServer(BaseHTTPRequestHandler):
                 item = dict(zip(columns, row))
                 queue.append(item)
             
-            conn.close()
+            has_more = len(queue) > limit
+            queue = queue[:limit]
+            response = {"downloads": queue, "next_cursor": queue[-1]['id'] if has_more else None}
+            
+            self.send_json(response)
             
+        except ValueError:
+            self.send_error(400, "Invalid cursor or limit")
+        except Exception as e:
+            self.send_error(500, str(e))
+    
+    def stream_events(self):
+        """Server-Sent Events: torrent deltas, queue transitions, client presence and new feed items"""
+        if not isinstance(self.server, PooledHTTPServer):
+            # A stream would hold the only thread for good; the dashboard polls instead
+            self.send_error(503, "Live updates need SERVER_MODE=threaded, poll instead")
+            return
+        after_id = get_event_pump().subscribe()
+        if after_id is None:
+            self.send_error(503, "Too many event streams, poll instead")
+            return
+        
+        try:
             self.send_response(200)
-            self.send_header('Content-type', 'application/json')
+            self.send_header('Content-type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            # The stream has no length, it ends when the connection does
+            self.send_header('Connection', 'close')
             self.end_headers()
-            self.wfile.write(json.dumps(queue).encode())
+            self.wfile.write(b'retry: 5000\n\n')
+            
+            # Open with the whole table so every later delta has a row to merge into
+            mirror = self.qbt.mirror
+            torrents = {torrent['hash']: torrent for torrent in mirror.get_torrents()}
+            message = (f"event: torrents\ndata: {json.dumps({'full': True, 'torrents': torrents, 'removed': []})}\n\n"
+                       f"event: qbt-status\ndata: {json.dumps(mirror.status())}\n\n")
+            self.wfile.write(message.encode())
+            self.wfile.flush()
+            
+            while True:
+                batch = events.wait(after_id, EVENTS_KEEPALIVE)
+                if batch is None:
+                    break
+                if batch:
+                    after_id = batch[-1][0]
+                    message = ''.join(f'event: {kind}\ndata: {payload}\n\n' for _, kind, payload in batch)
+                else:
+                    # Comment line so proxies and browsers keep the stream open
+                    message = ': keepalive\n\n'
+                self.wfile.write(message.encode())
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError, TimeoutError):
+            pass
+        finally:
+            events.unsubscribe()
+    
+    def get_metrics(self):
+        """Request, upstream, queue and client metrics in the Prometheus text format"""
+        try:
+            body = metrics.render().encode()
+            
+            self.send_response(200)
+            self.send_header('Content-type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_encoded(body)
             
         except Exception as e:
             self.send_error(500, str(e))
     
     def get_local_status(self):
-        """Check if local client is connected"""
+        """Connected local clients with their reported disk space and leased work"""
         try:
-            # Check database for recent client checkins
-            self.init_database()
-            
-            conn = sqlite3.connect('download_queue.db')
-            cursor = conn.execute('SELECT last_seen FROM clients ORDER BY last_seen DESC LIMIT 1')
-            result = cursor.fetchone()
-            conn.close()
-            
-            if result:
-                last_seen = datetime.fromisoformat(result[0])
-                time_diff = datetime.now() - last_seen
-                online = time_diff.total_seconds() < 60  # Online if seen within 60 seconds
-            else:
-                online = False
-            
+            conn = queue_db.connection()
+            leased = {holder: (count, reserved) for holder, count, reserved in conn.execute(
+                'SELECT claimed_by, COUNT(*), SUM(COALESCE(size_bytes, 0)) FROM downloads '
+                'WHERE status IN (?, ?) GROUP BY claimed_by',
+                LEASED_STATUSES
+            )}
+            
+            # Online state comes from in-memory heartbeats, not the clients table
+            clients = []
+            for record in get_client_registry().snapshot():
+                active, reserved = leased.get(record['client_id'], (0, 0))
+                clients.append({
+                    "client_id": record['client_id'],
+                    "online": ClientRegistry.is_online(record),
+                    "last_seen": record['last_seen'],
+                    "downloads_path": record['downloads_path'],
+                    "available_space": record['available_space'],
+                    "reserved_space": reserved,
+                    "active_downloads": active,
+                    "max_active": record['max_active']
+                })
+            
+            online = [client for client in clients if client['online']]
+            
+            # Top-level fields describe the most recently seen client
+            latest = online[0] if online else {}
             response = {
-                "online": online,
-                "downloads_path": "~/Downloads/BeyTV",
-                "available_space": 50 * 1024 * 1024 * 1024  # 50GB mock
+                "online": bool(online),
+                "online_clients": len(online),
+                "downloads_path": latest.get('downloads_path'),
+                "available_space": latest.get('available_space'),
+                "clients": clients
             }
             
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps(response).encode())
+            self.send_json(response)
             
         except Exception as e:
             self.send_error(500, str(e))
     
     def client_checkin(self):
-        """Handle local client checkin"""
+        """Handle local client checkin, leasing queued work to that client.
+        With 'wait' set, hold the request open until there is work to hand out"""
+        try:
+            data = self.read_json({})
+            client_id = str(data.get('client_id') or 'local_client')
+            cursor_seq = int(data.get('cursor', 0))
+            limit = max(1, min(int(data.get('limit', CHECKIN_PAGE_SIZE)), CHECKIN_MAX_PAGE_SIZE))
+            wait = max(0.0, min(float(data.get('wait', 0)), CHECKIN_MAX_WAIT))
+            info = self.client_fields(data)
+        except RequestBodyError as e:
+            self.send_error(e.status, str(e))
+            return
+        except (TypeError, ValueError):
+            self.send_error(400, "Invalid checkin fields")
+            return
+        
         try:
-            self.init_database()
+            if not isinstance(self.server, PooledHTTPServer):
+                # A held request would block the only thread; the client polls instead
+                wait = 0
+            max_active = info['max_active']
+            available_space = info['available_space']
+            
+            get_client_registry().heartbeat(client_id, **info)
+            
+            deadline = time.time() + wait
+            while True:
+                # Read before claiming so work queued in between still wakes us
+                generation = queue_signal.generation
+                rows, has_more = self.claim_downloads(client_id, cursor_seq, limit, max_active, available_space)
+                remaining = deadline - time.time()
+                if rows or remaining <= 0:
+                    break
+                queue_signal.wait(generation, remaining)
             
-            conn = sqlite3.connect('download_queue.db')
+            response = {
+                "queued_downloads": rows,
+                "cursor": rows[-1]['updated_seq'] if rows else cursor_seq,
+                "has_more": has_more,
+                "lease_seconds": LEASE_SECONDS,
+                "long_poll": wait > 0
+            }
             
-            # Update or insert client status
-            current_time = datetime.now().isoformat()
-            conn.execute(
-                'INSERT OR REPLACE INTO clients (client_id, last_seen, status) VALUES (?, ?, ?)',
-                ('local_client', current_time, 'online')
-            )
-            conn.commit()
-            conn.close()
+            self.send_json(response)
             
-            # Return any pending downloads
-            self.get_download_queue()
+        except Exception as e:
+            self.send_error(500, str(e))
+    
+    def client_heartbeat(self):
+        """Keep a local client's leases alive while it is busy downloading and not checking in"""
+        try:
+            data = self.read_json({})
+            client_id = str(data.get('client_id') or 'local_client')
+            info = self.client_fields(data)
+        except RequestBodyError as e:
+            self.send_error(e.status, str(e))
+            return
+        except (TypeError, ValueError):
+            self.send_error(400, "Invalid heartbeat fields")
+            return
+        
+        try:
+            # The registry's next flush extends this client's leases
+            get_client_registry().heartbeat(client_id, **info)
+            
+            response = {"status": "success", "lease_seconds": LEASE_SECONDS}
+            self.send_json(response)
             
         except Exception as e:
             self.send_error(500, str(e))
     
+    @staticmethod
+    def client_fields(data):
+        """What a checkin or heartbeat tells the registry; raises TypeError or ValueError
+        for numbers that aren't"""
+        def optional_int(value):
+            return None if value is None else int(value)
+        return {
+            'downloads_path': data.get('downloads_path'),
+            'available_space': optional_int(data.get('available_space')),
+            'max_active': optional_int(data.get('max_active')),
+            'working': None if data.get('working') is None else [int(download_id) for download_id in data['working']]
+        }
+    
+    def claim_downloads(self, client_id, cursor_seq, limit, max_active=None, available_space=None):
+        """Lease the scheduler's picks of queued rows to `client_id`; returns its unsent
+        claims and whether it could take more work right away"""
+        conn = queue_db.connection()
+        now = time.time()
+        
+        # Leases are kept alive by heartbeats in ClientRegistry, so a checkin with
+        # nothing it could claim stays a read and never takes the write lock
+        queued, held = conn.execute(
+            'SELECT EXISTS (SELECT 1 FROM downloads WHERE status = ?), '
+            '(SELECT COUNT(*) FROM downloads WHERE claimed_by = ? AND status IN (?, ?))',
+            ('queued', client_id, *LEASED_STATUSES)
+        ).fetchone()
+        if queued and (max_active is None or held < int(max_active)):
+            has_more = self.claim_queued(conn, now, client_id, limit, max_active, available_space)
+        else:
+            has_more = False
+        
+        # This client's claims it has not been sent yet
+        cursor = conn.execute(
+            'SELECT * FROM downloads WHERE claimed_by = ? AND status = ? AND updated_seq > ? ORDER BY updated_seq',
+            (client_id, 'claimed', cursor_seq)
+        )
+        columns = [description[0] for description in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return rows, bool(has_more)
+    
+    def claim_queued(self, conn, now, client_id, limit, max_active, available_space):
+        """Lease the scheduler's picks to `client_id`; returns whether it could take more"""
+        # One write transaction, taken up front, so two clients can never claim the same row
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            
+            # Fair share counts everything in flight, on every client
+            active = Counter()
+            held = reserved = 0
+            for category, requested_by, holder, count, size in conn.execute(
+                'SELECT category, requested_by, claimed_by, COUNT(*), SUM(COALESCE(size_bytes, 0)) FROM downloads '
+                'WHERE status IN (?, ?) GROUP BY category, requested_by, claimed_by',
+                LEASED_STATUSES
+            ):
+                active[('category', category)] += count
+                active[('user', requested_by)] += count
+                if holder == client_id:
+                    held += count
+                    reserved += size
+            
+            slots = limit
+            if max_active is not None:
+                slots = max(0, min(limit, int(max_active) - held))
+            
+            # The highest priorities and the longest waiting, so aging can surface old rows
+            candidates = [] if slots == 0 else [dict(zip(
+                ('id', 'priority', 'category', 'requested_by', 'size_bytes', 'hours_waited'), row
+            )) for row in conn.execute(
+                "SELECT id, priority, category, requested_by, size_bytes, "
+                "(julianday('now') - julianday(queued_at)) * 24 FROM downloads WHERE id IN ("
+                'SELECT id FROM (SELECT id FROM downloads WHERE status = ? ORDER BY priority DESC, id LIMIT ?) '
+                'UNION SELECT id FROM (SELECT id FROM downloads WHERE status = ? ORDER BY id LIMIT ?))',
+                ('queued', SCHEDULER_WINDOW, 'queued', SCHEDULER_WINDOW)
+            )]
+            
+            # Work already leased to this client still has to fit on its disk; claims are
+            # made inside this write transaction, so concurrent checkins cannot overcommit
+            space = None
+            if available_space is not None:
+                space = int(available_space) - reserved - CLIENT_MIN_FREE_BYTES
+            chosen = scheduler.pick(candidates, active, slots, space)
+            conn.executemany(
+                'UPDATE downloads SET status = ?, claimed_by = ?, lease_expires = ? WHERE id = ? AND status = ?',
+                [('claimed', client_id, now + LEASE_SECONDS, row['id'], 'queued') for row in chosen]
+            )
+            
+            # Come straight back only if every free slot was filled and work is left
+            return slots > 0 and len(chosen) == slots and len(candidates) > slots
+    
     def update_download_status(self):
         """Update download status from local client"""
         try:
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode('utf-8'))
+            data = self.read_json()
             
-            conn = sqlite3.connect('download_queue.db')
-            conn.execute(
-                'UPDATE downloads SET status = ?, local_path = ? WHERE id = ?',
-                (data['status'], data.get('local_path', ''), data['id'])
-            )
-            conn.commit()
-            conn.close()
+            client_id = str(data.get('client_id') or 'local_client')
+            if self.apply_status_updates(client_id, [data]) == 0:
+                self.send_error(409, "Download is not leased to this client")
+                return
             
             response = {"status": "success"}
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps(response).encode())
+            self.send_json(response)
             
+        except RequestBodyError as e:
+            self.send_error(e.status, str(e))
+        except ValueError as e:
+            self.send_error(400, str(e))
         except Exception as e:
             self.send_error(500, str(e))
     
-    def init_database(self):
-        """Initialize SQLite database"""
-        conn = sqlite3.connect('download_queue.db')
-        
-        # Enhanced downloads table
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS downloads (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                url TEXT NOT NULL,
-                status TEXT DEFAULT 'queued',
-                queued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                local_path TEXT,
-                torrent_hash TEXT,
-                qbt_host TEXT,
-                qbt_port INTEGER
-            )
-        ''')
-        
-        # Client tracking table
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS clients (
-                client_id TEXT PRIMARY KEY,
-                last_seen TIMESTAMP,
-                status TEXT
-            )
-        ''')
+    def update_download_status_batch(self):
+        """Apply a local client's buffered status updates in one commit"""
+        try:
+            data = self.read_json()
+            
+            client_id = str(data.get('client_id') or 'local_client')
+            updates = data.get('updates', [])
+            updated = self.apply_status_updates(client_id, updates)
+            
+            # Rows no longer leased to this client are skipped, not failed
+            response = {"status": "success", "updated": updated, "rejected": len(updates) - updated}
+            self.send_json(response)
+            
+        except RequestBodyError as e:
+            self.send_error(e.status, str(e))
+        except ValueError as e:
+            self.send_error(400, str(e))
+        except Exception as e:
+            self.send_error(500, str(e))
+    
+    def apply_status_updates(self, client_id, updates):
+        """Write status updates held by `client_id` in one transaction; returns rows changed.
+        Raises ValueError, before writing anything, if any update is malformed"""
+        if not isinstance(updates, list):
+            raise ValueError("Updates must be a list")
+        for update in updates:
+            status = update.get('status') if isinstance(update, dict) else None
+            if status not in CLIENT_STATUSES:
+                raise ValueError(f"Invalid status {status!r}, expected one of {', '.join(CLIENT_STATUSES)}")
         
-        conn.commit()
-        conn.close()
+        now = time.time()
+        rows = []
+        requeued = False
+        for update in updates:
+            status = update['status']
+            # Active work keeps its lease, finished work drops it, requeued work is released
+            lease_expires = now + LEASE_SECONDS if status in LEASED_STATUSES else None
+            claimed_by = None if status == 'queued' else client_id
+            requeued = requeued or status == 'queued'
+            rows.append((status, update.get('local_path') or '', claimed_by, lease_expires,
+                         update.get('id', update.get('download_id')), client_id))
+        if not rows:
+            return 0
+        
+        conn = queue_db.connection()
+        with conn:
+            cursor = conn.executemany(
+                'UPDATE downloads SET status = ?, local_path = ?, claimed_by = ?, lease_expires = ? '
+                'WHERE id = ? AND claimed_by = ?',
+                rows
+            )
+        if requeued:
+            queue_signal.notify()
+        return cursor.rowcount
+    
+    def init_database(self):
+        """Create or migrate the SQLite schema and start queue maintenance"""
+        queue_db.migrate()
+        get_queue_janitor()
+        get_client_registry()
 
 def main():
     """Start BeyTV Remote Control Server"""
@@ -952,11 +2376,14 @@ def main():
     server = BeyTVServer
     server.init_database(server)
     
+    # Start crawling feeds before the first dashboard asks for them
+    get_feed_refresher()
+    
     # Start server
     port = int(os.environ.get('PORT', 8000))
-    httpd = HTTPServer(('0.0.0.0', port), BeyTVServer)
+    httpd = make_server(('0.0.0.0', port), BeyTVServer)
     
-    print(f"✅ BeyTV Remote Control running on http://localhost:{port}")
+    print(f"✅ BeyTV Remote Control running on http://localhost:{port} ({describe_mode(httpd)})")
     print("🌊 Connect qBittorrent at http://localhost:8080")
     print("🖥️ Run local_client.py on your machine for downloads")
     print("🎯 Use Ctrl+C to stop")
@@ -965,7 +2392,9 @@ def main():
         httpd.serve_forever()
     except KeyboardInterrupt:
         print("\n🛑 BeyTV Remote Control stopped")
+        events.close()
         httpd.server_close()
+        get_client_registry().flush()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
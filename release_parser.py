@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+BeyTV Release Parser - structured metadata from torrent release names
+Shared by the dashboard feed pipeline and the local Plex client
+"""
+
+import re
+import base64
+from collections import namedtuple
+from functools import lru_cache
+
+# One alternation scanned once per title; every token must stand alone
+# between separators so 'deep' is not an episode and 'x2650' is not a codec
+TOKEN_RE = re.compile(r'''
+    (?<![a-z0-9])
+    (?:
+        (?P<resolution>2160p|1080p|720p|576p|480p|4k|uhd)
+      | (?P<source>blu-?ray|bdrip|brrip|remux|web-?dl|web-?rip|web|hdtv|dvdrip|hdrip|hdcam|cam|telesync)
+      | (?P<codec>[xh]\.?26[45]|hevc|avc|xvid|av1)
+      | s(?P<season>\d{1,2})(?:[ ._-]?e(?P<episode>\d{1,3}))?
+      | (?P<x_season>\d{1,2})x(?P<x_episode>\d{2,3})
+      | season[ ._-]?(?P<word_season>\d{1,2})
+      | (?:episode|ep)[ ._-]?(?P<word_episode>\d{1,3})
+      | (?P<year>19[2-9]\d|20\d\d)
+      | (?P<size>\d+(?:\.\d+)?)[ ]?(?P<unit>[kmgt]i?b)
+    )
+    (?![a-z0-9])
+''', re.IGNORECASE | re.VERBOSE)
+
+SIZE_RE = re.compile(r'(\d+(?:\.\d+)?)\s*([kmgt])i?b\b', re.IGNORECASE)
+MAGNET_RE = re.compile(r'magnet:\?[^"<>\s]+')
+BTIH_RE = re.compile(r'xt=urn:btih:([0-9a-f]{40}|[a-z2-7]{32})(?![0-9a-z])', re.IGNORECASE)
+
+SIZE_UNITS = {'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3, 't': 1024 ** 4}
+
+RESOLUTIONS = {'4k': '2160p', 'uhd': '2160p'}
+SOURCES = {
+    'bluray': 'bluray', 'blu-ray': 'bluray', 'bdrip': 'bluray', 'brrip': 'bluray', 'remux': 'bluray',
+    'web-dl': 'web', 'webdl': 'web', 'webrip': 'web', 'web-rip': 'web', 'web': 'web',
+    'hdtv': 'hdtv', 'dvdrip': 'dvd', 'hdrip': 'hdrip',
+    'hdcam': 'cam', 'cam': 'cam', 'telesync': 'cam'
+}
+CODECS = {
+    'x264': 'x264', 'x.264': 'x264', 'h264': 'x264', 'h.264': 'x264', 'avc': 'x264',
+    'x265': 'x265', 'x.265': 'x265', 'h265': 'x265', 'h.265': 'x265', 'hevc': 'x265',
+    'xvid': 'xvid', 'av1': 'av1'
+}
+
+class Release(namedtuple('Release', 'title resolution source codec season episode year size_bytes')):
+    """Parsed release name; immutable so it can be shared from the cache"""
+
+    __slots__ = ()
+
+    @property
+    def is_tv(self):
+        return self.season is not None or self.episode is not None
+
+    @property
+    def content_type(self):
+        return 'tv' if self.is_tv else 'movie'
+
+    def as_dict(self):
+        info = self._asdict()
+        del info['title']
+        info['type'] = self.content_type
+        return info
+
+@lru_cache(maxsize=4096)
+def parse_release(title):
+    """Resolution, source, codec, season/episode, year and size from a release name"""
+    found = {}
+    years = []
+
+    for match in TOKEN_RE.finditer(title or ''):
+        kind = match.lastgroup
+        if kind in ('episode', 'x_episode', 'word_episode'):
+            # Matched together with its season, or on its own as 'Episode 5'
+            found.setdefault('episode', int(match.group(kind)))
+            season = match.group('season') or match.group('x_season')
+            if season:
+                found.setdefault('season', int(season))
+        elif kind in ('season', 'word_season'):
+            found.setdefault('season', int(match.group(kind)))
+        elif kind == 'year':
+            years.append(int(match.group(kind)))
+        elif kind == 'unit':
+            found.setdefault('size_bytes', size_from_match(match.group('size'), match.group('unit')))
+        else:
+            value = match.group(kind).lower()
+            table = {'resolution': RESOLUTIONS, 'source': SOURCES, 'codec': CODECS}[kind]
+            found.setdefault(kind, table.get(value, value))
+
+    return Release(
+        title=title,
+        resolution=found.get('resolution'),
+        source=found.get('source'),
+        codec=found.get('codec'),
+        season=found.get('season'),
+        episode=found.get('episode'),
+        # The release year comes last: '2001 A Space Odyssey 1968'
+        year=years[-1] if years else None,
+        size_bytes=found.get('size_bytes')
+    )
+
+def size_from_match(number, unit):
+    return int(float(number) * SIZE_UNITS[unit[0].lower()])
+
+@lru_cache(maxsize=4096)
+def parse_size(text):
+    """First size such as '1.4 GB' or '700 MiB' in `text`, in bytes, or None"""
+    match = SIZE_RE.search(text or '')
+    if not match:
+        return None
+    return size_from_match(match.group(1), match.group(2))
+
+def format_size(size_bytes):
+    """Human readable size, '1.4 GB'"""
+    if size_bytes is None:
+        return "Unknown"
+    for unit in ('TB', 'GB', 'MB', 'KB'):
+        scale = SIZE_UNITS[unit[0].lower()]
+        if size_bytes >= scale:
+            return f"{round(size_bytes / scale, 2):g} {unit}"
+    return f"{size_bytes} B"
+
+def find_magnet(text):
+    """First magnet link embedded in `text`, or None"""
+    if 'magnet:' not in (text or ''):
+        return None
+    match = MAGNET_RE.search(text)
+    return match.group(0) if match else None
+
+def parse_infohash(magnet):
+    """Canonical lower-case hex BitTorrent infohash from a magnet link, or None"""
+    match = BTIH_RE.search(magnet or '')
+    if not match:
+        return None
+    value = match.group(1)
+    if len(value) == 32:
+        value = base64.b32decode(value.upper()).hex()
+    return value.lower()